@@ -3,7 +3,8 @@ import config  # Loads environment variables from .env
 
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
+from agent_module.embeddings import get_embedding_model
 from langchain_chroma import Chroma
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_classic.chains import create_retrieval_chain
@@ -31,7 +32,7 @@ print(f"Split into {len(splits)} chunks.")
 # 4. CREATE VECTOR STORE (The "Brain" of RAG)
 # This converts text -> numbers -> database
 print("--- Creating Vector Store (This may take a moment) ---")
-vectorstore = Chroma.from_documents(documents=splits, embedding=OpenAIEmbeddings())
+vectorstore = Chroma.from_documents(documents=splits, embedding=get_embedding_model())
 
 # Make the vector store a "Retriever" (Search Engine)
 retriever = vectorstore.as_retriever()
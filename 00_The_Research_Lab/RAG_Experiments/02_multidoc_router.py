@@ -9,7 +9,8 @@ from langchain_community.document_loaders import (
 )
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
+from agent_module.embeddings import get_embedding_model
 from langchain_chroma import Chroma
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_classic.chains import create_retrieval_chain
@@ -71,7 +72,7 @@ splits = text_splitter.split_documents(docs)
 # -------- VECTOR STORE --------
 vectorstore = Chroma.from_documents(
     documents=splits,
-    embedding=OpenAIEmbeddings(),
+    embedding=get_embedding_model(),
     persist_directory="chroma_multi_modal",
 )
 
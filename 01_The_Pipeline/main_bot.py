@@ -1,15 +1,18 @@
 import os
 import sys
-import shutil  # <--- NEW: Tool to delete folders
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 # 1. IMPORTS
-# Loaders & Splitters
-from langchain_community.document_loaders import PyPDFDirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+# Splitters & Incremental Indexing
+from agent_module.chunking import get_text_splitter
+from agent_module.indexing import open_vectorstore, sync_vectorstore
+
+# Embeddings (cached on disk, so unchanged text is never re-embedded)
+from agent_module.embeddings import get_embedding_model
 
-# Vector Store & Embeddings
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+# LLM
+from langchain_openai import ChatOpenAI
 
 # Chains & Prompts
 from langchain_classic.chains import (
@@ -21,7 +24,8 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 # Memory & Persistence
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_community.chat_message_histories import FileChatMessageHistory
+from agent_module.history_store import SQLiteChatMessageHistory
+from agent_module.history_policy import HistoryWindow
 
 # --- CONFIGURATION ---
 os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
@@ -31,107 +35,37 @@ PERSIST_DIRECTORY = "./chroma_db"  # Where to save the vector database on disk
 
 
 # --- PART 1: THE KNOWLEDGE BASE ---
-# --- NEW IMPORTS FOR DIFFERENT FILE TYPES ---
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    CSVLoader,
-    Docx2txtLoader,
-    UnstructuredImageLoader,
-)
+def setup_vectorstore():
+    # 1. Open the existing database (no more flushing on every run)
+    embedding_model = get_embedding_model()
+    vectorstore = open_vectorstore(PERSIST_DIRECTORY, embedding_model)
 
+    # 2. Sync it with the folder: only added/changed files get loaded,
+    #    split and embedded; chunks of deleted files are removed.
+    print(f"--- 1. Scanning '{DATA_FOLDER}' for new or changed files ---")
+    # Format-aware: Q&A pairs, Markdown sections, functions and CSV rows stay whole
+    text_splitter = get_text_splitter()
+    stats = sync_vectorstore(vectorstore, DATA_FOLDER, PERSIST_DIRECTORY, text_splitter)
 
-def setup_vectorstore():
-    # 1. Clean up old database
-    if os.path.exists(PERSIST_DIRECTORY):
-        print(f"--- 0. Flushing old memory: Deleting '{PERSIST_DIRECTORY}' ---")
-        shutil.rmtree(PERSIST_DIRECTORY)
-
-    print(f"--- 1. Scanning '{DATA_FOLDER}' for ALL supported files ---")
-
-    all_docs = []
-
-    # 2. Walk through the directory file by file
-    for root, dirs, files in os.walk(DATA_FOLDER):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_ext = os.path.splitext(file)[1].lower()
-
-            loader = None
-
-            try:
-                # --- THE ROUTER (Decides which tool to use) ---
-                if file_ext == ".pdf":
-                    loader = PyPDFLoader(file_path)
-
-                elif file_ext == ".docx":
-                    loader = Docx2txtLoader(file_path)
-
-                elif file_ext == ".csv":
-                    loader = CSVLoader(file_path)
-
-                elif file_ext in [
-                    ".txt",
-                    ".py",
-                    ".sh",
-                    ".md",
-                    ".json",
-                    ".log",
-                    ".java",
-                    ".c",
-                ]:
-                    # Code files are just text files!
-                    loader = TextLoader(file_path)
-
-                elif file_ext in [".jpg", ".png", ".jpeg"]:
-                    # REQUIRES TESSERACT INSTALLED ON UBUNTU
-                    # sudo apt-get install tesseract-ocr
-                    # loader = UnstructuredImageLoader(file_path)
-                    print(f" SKIPPING IMAGE: {file} (OCR Engine not installed)")
-                    continue
-
-                else:
-                    print(f" SKIPPING UNKNOWN FILE: {file}")
-                    continue
-
-                # --- LOAD THE FILE ---
-                print(f"   > Loading: {file} ({file_ext})")
-                file_docs = loader.load()
-                all_docs.extend(file_docs)
-
-            except Exception as e:
-                print(f"   ❌ ERROR loading {file}: {e}")
+    print(f"   > Embedding cache: {embedding_model.stats()}")
 
     # 3. Validation
-    if not all_docs:
+    if not stats["files"]:
         print("ERROR: No valid documents found!")
         sys.exit()
 
-    print(f"   > Total Pages/Files Loaded: {len(all_docs)}")
-
-    # 4. Split
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    splits = text_splitter.split_documents(all_docs)
-    print(f"   > Split into {len(splits)} chunks.")
-
-    # 5. Store
-    print("--- 2. Building Fresh Vector Database ---")
-    vectorstore = Chroma.from_documents(
-        documents=splits,
-        embedding=OpenAIEmbeddings(),
-        persist_directory=PERSIST_DIRECTORY,
-    )
     return vectorstore
 
 
 # --- PART 2: THE BRAINS (Chains) ---
-def create_conversational_rag_chain(vectorstore):
+def create_conversational_rag_chain(vectorstore, llm=None):
     """
     Creates the dual-brain chain:
     Brain 1: Rewrites the question based on history.
     Brain 2: Answers the question based on docs.
+    llm defaults to gpt-4o-mini (benchmarks pass an offline fake).
     """
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0)
 
     # 1. The Retriever (Search Engine)
     # k=6 allows it to find multiple docs (good for comparing Arati vs Others)
@@ -186,13 +120,15 @@ def create_conversational_rag_chain(vectorstore):
 
     # 4. Connect everything
     rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
-    return rag_chain
+
+    # 5. Keep the history under a token budget (both brains see it)
+    return HistoryWindow("history", summarizer=llm).wrap(rag_chain)
 
 
 # --- PART 3: MEMORY PERSISTENCE ---
 def get_session_history(session_id: str):
-    # Saves chat history to a JSON file
-    return FileChatMessageHistory(f"./memory_{session_id}.json")
+    # Saves chat history to a shared SQLite file (one row per message)
+    return SQLiteChatMessageHistory(session_id, "./chat_history.sqlite")
 
 
 # --- MAIN EXECUTION ---
@@ -217,7 +153,7 @@ if __name__ == "__main__":
     print("-------------------------------------------------")
 
     # 4. Chat Loop
-    # We use a session ID so the memory file is unique to 'dhamu'
+    # We use a session ID so the memory is unique to 'dhamu'
     config = {"configurable": {"session_id": "dhamu"}}
 
     while True:
@@ -1,12 +1,16 @@
 import streamlit as st
 import sys
 import os
-import time
+import threading
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from agent_module.agent import setup_vectorstore, create_agent_system, log_agent_steps
-from langchain_community.chat_message_histories import FileChatMessageHistory
+from agent_module.sessions import SessionHistoryCache
+from agent_module.history_store import SQLiteChatMessageHistory
+from agent_module.history_policy import SUMMARY_TAG
+from langchain_core.callbacks import BaseCallbackHandler
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
 # --- PAGE CONFIGURATION ---
@@ -37,15 +41,13 @@ st.markdown(
 # --- HEADER ---
 st.title("🧠 Arati's Digital Twin")
 
-st.markdown(
-    """
+st.markdown("""
 Hi, I'm **Arati's AI Twin** 👋  
 
 I can talk about my **projects, skills, and experience**,  
 and also explore the **internet when needed** 🌍  
 
-"""
-)
+""")
 
 # --- SESSION STATE ---
 if "messages" not in st.session_state:
@@ -61,14 +63,82 @@ if len(st.session_state.messages) == 0:
 
 
 # --- LOAD AGENT ---
+def get_session_history(session_id: str):
+    return SQLiteChatMessageHistory(session_id, "./chat_history_agent.sqlite")
+
+
 @st.cache_resource
 def load_agent():
     vectorstore = setup_vectorstore()
     agent_executor = create_agent_system(vectorstore)
-    return agent_executor
 
+    # Built once per process (not per message), with one reusable
+    # history handle per session
+    return RunnableWithMessageHistory(
+        agent_executor,
+        SessionHistoryCache(get_session_history),
+        input_messages_key="input",
+        history_messages_key="chat_history",
+    )
+
+
+agent_with_memory = load_agent()
+
+
+# --- STREAMING ---
+TOOL_LABELS = {
+    "search_my_files": "🔎 Searching my files...",
+    "duckduckgo_search": "🌍 Searching the web...",
+}
+
+
+class StreamlitStreamHandler(BaseCallbackHandler):
+    """Writes LLM tokens into the placeholder as they arrive, and tool progress into a status box."""
+
+    run_inline = True
+
+    def __init__(self, placeholder, status):
+        self.placeholder = placeholder
+        self.status = status
+        self.text = ""
+        # Parallel tool calls report from worker threads, which need the
+        # script context to draw, and may overlap
+        self.ctx = get_script_run_ctx()
+        self.lock = threading.Lock()
+        self.tools_running = 0
+
+    def _attach(self):
+        add_script_run_ctx(threading.current_thread(), self.ctx)
+
+    def on_llm_new_token(self, token, **kwargs):
+        if not token or SUMMARY_TAG in (kwargs.get("tags") or []):
+            return
+        self.text += token
+        self.placeholder.markdown(self.text + "▌")
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self._attach()
+        name = (serialized or {}).get("name") or kwargs.get("name", "")
+        label = TOOL_LABELS.get(name, f"🛠️ Running {name}...")
+        with self.lock:
+            self.tools_running += 1
+            # Anything said before a tool call was thinking out loud, not the answer
+            self.text = ""
+            self.placeholder.empty()
+            self.status.update(label=label, state="running")
+            self.status.write(label)
+
+    def on_tool_end(self, output, **kwargs):
+        self._attach()
+        with self.lock:
+            self.tools_running -= 1
+            if self.tools_running == 0:
+                self.status.update(label="✅ Got what I needed", state="complete")
+
+    def on_tool_error(self, error, **kwargs):
+        with self.lock:
+            self.tools_running -= 1
 
-agent_executor = load_agent()
 
 # --- DISPLAY CHAT ---
 for message in st.session_state.messages:
@@ -87,42 +157,36 @@ if user_input := st.chat_input(
 
     # --- RESPONSE ---
     with st.chat_message("assistant"):
+        status = st.status("🤔 Thinking...", expanded=False)
         message_placeholder = st.empty()
+        stream_handler = StreamlitStreamHandler(message_placeholder, status)
 
         try:
-
-            def get_session_history(session_id: str):
-                return FileChatMessageHistory(f"./memory_agent_{session_id}.json")
-
-            agent_with_memory = RunnableWithMessageHistory(
-                agent_executor,
-                get_session_history,
-                input_messages_key="input",
-                history_messages_key="chat_history",
-            )
-
-            config = {"configurable": {"session_id": "streamlit_user_v2"}}
+            config = {
+                "configurable": {"session_id": "streamlit_user_v2"},
+                "callbacks": [stream_handler],
+            }
 
             response = agent_with_memory.invoke({"input": user_input}, config=config)
 
-            # --- PRINT LOGS TO TERMINAL ---
-            log_agent_steps(response)
+            # --- TRACE LOG (JSON lines, written in the background) ---
+            log_agent_steps(response, session_id="streamlit_user_v2")
 
             full_response = response["output"]
 
             # --- HUMANIZATION ---
             full_response = full_response.replace("Arati's", "my")
 
-            # --- TYPING EFFECT ---
-            typed_text = ""
-            for char in full_response:
-                typed_text += char
-                message_placeholder.write(typed_text)
-                time.sleep(0.006)
+            # --- FINAL RENDER ---
+            # Tokens were already streamed; this swaps in the cleaned-up text
+            # (and shows cached / fast-path answers, which stream nothing)
+            message_placeholder.write(full_response)
+            status.update(label="✅ Done", state="complete")
 
         except Exception as e:
             full_response = f"❌ Error: {str(e)}"
             message_placeholder.error(full_response)
+            status.update(label="Something went wrong", state="error")
 
     st.session_state.messages.append({"role": "assistant", "content": full_response})
 
@@ -1,23 +1,31 @@
 import os
-import shutil
-
-# --- LOADERS ---
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    CSVLoader,
-    Docx2txtLoader,
-)
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# --- INDEXING ---
+from agent_module.indexing import open_vectorstore, sync_vectorstore, index_version
+from agent_module.embeddings import get_embedding_model
+from agent_module.history_policy import HistoryWindow
+from agent_module.answer_cache import AnswerCache
+from agent_module.qa_fastpath import QAFastPath
+from agent_module.lexical_index import BM25Index, HybridRetriever
+from agent_module.chunking import get_text_splitter
+from agent_module.trace_log import AGENT_VERBOSE
+from agent_module.metrics import INGEST_SECONDS, ingest_totals, timed
+from langchain_openai import ChatOpenAI
 
 # --- TOOLS ---
 from langchain_classic.tools.retriever import create_retriever_tool
-from langchain_community.tools import DuckDuckGoSearchRun
+from agent_module.web_search import get_web_search_tool
 
 # --- AGENT (The Universal Fix) ---
-from langchain.agents import initialize_agent, AgentType
+# langchain>=1.0 moved the legacy agent constructors to langchain_classic
+from langchain_classic.agents import (
+    AgentExecutor,
+    OpenAIFunctionsAgent,
+    create_openai_functions_agent,
+)
 from langchain_classic.schema import SystemMessage
 from langchain_classic.prompts import MessagesPlaceholder
 
@@ -26,62 +34,77 @@ os.environ["OPENAI_API_KEY"] = "sk-proj-..."  # <--- PASTE YOUR KEY HERE
 DATA_FOLDER = "../data/"
 PERSIST_DIRECTORY = "./chroma_db_api"
 
-
-# 1. SETUP DATABASE (Same as before)
-def initialize_vectorstore():
-    # Only clear if you want fresh data every restart
-    if os.path.exists(PERSIST_DIRECTORY):
-        shutil.rmtree(PERSIST_DIRECTORY)
-
-    print("--- [CORE] Building Vector Database... ---")
-    all_docs = []
-
-    for root, dirs, files in os.walk(DATA_FOLDER):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_ext = os.path.splitext(file)[1].lower()
-            loader = None
-            try:
-                if file_ext == ".pdf":
-                    loader = PyPDFLoader(file_path)
-                elif file_ext == ".docx":
-                    loader = Docx2txtLoader(file_path)
-                elif file_ext == ".csv":
-                    loader = CSVLoader(file_path)
-                elif file_ext in [".txt", ".py", ".md", ".json", ".java", ".sh"]:
-                    loader = TextLoader(file_path)
-
-                if loader:
-                    all_docs.extend(loader.load())
-            except Exception:
-                pass
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    splits = text_splitter.split_documents(all_docs)
-
-    vectorstore = Chroma.from_documents(
-        documents=splits,
-        embedding=OpenAIEmbeddings(),
-        persist_directory=PERSIST_DIRECTORY,
+# The answer cache and fast path of the last agent built (read by /metrics)
+answer_cache = None
+fast_path = None
+
+
+# 1. SETUP DATABASE (Incremental: only new/changed files get embedded)
+def initialize_vectorstore(
+    on_batch=None,
+    embedding=None,
+    data_folder=DATA_FOLDER,
+    persist_directory=PERSIST_DIRECTORY,
+):
+    print("--- [CORE] Syncing Vector Database... ---")
+    vectorstore = open_vectorstore(
+        persist_directory, embedding or get_embedding_model()
     )
+
+    # Format-aware: Q&A pairs, Markdown sections, functions and CSV rows stay whole
+    text_splitter = get_text_splitter()
+    with timed("total", INGEST_SECONDS):
+        sync_vectorstore(
+            vectorstore,
+            data_folder,
+            persist_directory,
+            text_splitter,
+            on_batch=on_batch,
+        )
+    # Load/split/embed/upsert overlap, so the stages add up to more than the total
+    timings = ", ".join(f"{stage} {s:.1f}s" for stage, s in ingest_totals().items())
+    print(f"   > Ingestion time by stage: {timings}")
     return vectorstore
 
 
 # 2. SETUP AGENT (The Robust Way)
-def get_agent_executor():
-    vectorstore = initialize_vectorstore()
+def get_agent_executor(
+    on_batch=None,
+    llm=None,
+    embedding=None,
+    search_backend=None,
+    data_folder=DATA_FOLDER,
+    persist_directory=PERSIST_DIRECTORY,
+):
+    # on_batch(batches, chunks) reports ingestion progress (used by /ready);
+    # llm / embedding / search_backend default to the real services
+    # (benchmarks pass offline fakes)
+    global answer_cache, fast_path
+    vectorstore = initialize_vectorstore(
+        on_batch, embedding, data_folder, persist_directory
+    )
 
     # A. The Brain
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    # streaming=True lets /chat/stream relay answer tokens as they arrive
+    llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0, streaming=True)
 
     # B. The Tools
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+    # Hybrid BM25 + vector search over the same chunks; repeated tool queries
+    # skip the embed + search (cache shared by all sessions)
+    version = index_version(vectorstore)
+    retriever = HybridRetriever(
+        vectorstore=vectorstore,
+        lexical=BM25Index.from_vectorstore(vectorstore),
+        k=5,
+        index_version=version,
+    )
     rag_tool = create_retriever_tool(
         retriever,
         "search_my_files",
         "Searches Arati's personal files, resume, and projects.",
     )
-    web_tool = DuckDuckGoSearchRun()
+    # One slow search can no longer hold a request: cached, with a deadline
+    web_tool = get_web_search_tool(search_backend)
     tools = [rag_tool, web_tool]
 
     # C. The Persona (System Message)
@@ -96,20 +119,36 @@ def get_agent_executor():
 
     # D. The Memory Handling
     # This tells the Agent to expect a variable called 'chat_history'
-    agent_kwargs = {
-        "system_message": system_message,
-        "extra_prompt_messages": [MessagesPlaceholder(variable_name="chat_history")],
-    }
-
-    # E. The Constructor (initialize_agent)
-    # This function handles the specific "New vs Old" import logic internally
-    agent_executor = initialize_agent(
+    prompt = OpenAIFunctionsAgent.create_prompt(
+        system_message=system_message,
+        extra_prompt_messages=[MessagesPlaceholder(variable_name="chat_history")],
+    )
+
+    # E. The Constructor
+    # Same OpenAI-functions agent initialize_agent built, but as a runnable:
+    # the legacy OpenAIFunctionsAgent.plan passes callbacks twice to the LLM
+    # on langchain-core 1.x and fails on every turn
+    agent = create_openai_functions_agent(llm, tools, prompt)
+    agent_executor = AgentExecutor(
+        agent=agent,
         tools=tools,
-        llm=llm,
-        agent=AgentType.OPENAI_FUNCTIONS,  # Uses the reliable Function Calling API
-        verbose=True,
-        agent_kwargs=agent_kwargs,
-        memory=None,  # We manage memory externally in server.py, so we set this to None
+        verbose=AGENT_VERBOSE,  # traces go through trace_log instead (AGENT_VERBOSE=1 to debug)
+        return_intermediate_steps=True,
+        # No memory here: server.py manages history externally
     )
 
-    return agent_executor
+    # F. The History Budget
+    # Only the newest turns that fit HISTORY_TOKEN_BUDGET go in verbatim;
+    # older ones are folded into a cached rolling summary
+    agent_system = HistoryWindow("chat_history", summarizer=llm).wrap(agent_executor)
+
+    # G. The Answer Cache
+    # "Tell me about yourself" for the 50th time skips the whole agent loop;
+    # a fresh cache per build, so a re-synced index never serves old answers
+    answer_cache = AnswerCache(vectorstore.embeddings)
+    agent_system = answer_cache.wrap(agent_system)
+
+    # H. The Fast Path
+    # Questions matching a curated Q: in the HR Q&A file get its A: directly
+    fast_path = QAFastPath.from_folder(data_folder, vectorstore.embeddings)
+    return fast_path.wrap(agent_system)
@@ -1,7 +1,26 @@
-from fastapi import FastAPI, HTTPException
+import os
+import sys
+import time
+import json
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import rag_core
 from rag_core import get_agent_executor
-from langchain_community.chat_message_histories import FileChatMessageHistory
+from agent_module.sessions import SessionHistoryCache
+from agent_module.history_policy import SUMMARY_TAG
+from agent_module.history_store import SQLiteChatMessageHistory
+from agent_module.trace_log import log_agent_steps
+from agent_module.metrics import CONTENT_TYPE, REGISTRY, GaugeFunction, RequestTrace
+from agent_module import retriever_cache, web_search
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
 
@@ -17,33 +36,109 @@ class ChatResponse(BaseModel):
     sources: list = []  # Future proofing
 
 
-# 2. START THE APP
-app = FastAPI(title="Arati AI Portfolio API", version="1.0")
+# 2. LOAD THE BRAIN (In the background, so the port opens immediately)
+# Seconds a client should wait before retrying /chat while the index builds
+RETRY_AFTER_SECONDS = 5
+# Threads for the blocking bits of a request (file history, Chroma, web search)
+CHAT_THREADPOOL_SIZE = int(os.getenv("CHAT_THREADPOOL_SIZE", "32"))
+# How often an idle /chat/stream checks whether the client is still there
+DISCONNECT_POLL_SECONDS = 1.0
+
+agent_executor = None
+agent_with_memory = None
+build_state = {
+    "status": "starting",  # starting -> building -> ready | failed
+    "started_at": None,
+    "finished_at": None,
+    "batches_embedded": 0,
+    "chunks_embedded": 0,
+    "error": None,
+}
+
+
+def _on_batch(batches, chunks):
+    build_state["batches_embedded"] = batches
+    build_state["chunks_embedded"] = chunks
+
+
+# Memory: one shared SQLite store (O(1) appends), one handle per session
+HISTORY_DB = "./chat_history_api.sqlite"
+
+
+def get_session_history(session_id: str):
+    return SQLiteChatMessageHistory(session_id, HISTORY_DB)
+
+
+session_histories = SessionHistoryCache(get_session_history)
 
-# 3. LOAD THE BRAIN (On Startup)
-print("--- Starting Server & Loading Brain... ---")
-agent_executor = get_agent_executor()
-print("--- Brain Loaded! ---")
+
+def create_agent_with_memory(agent):
+    # Built once at startup, not on every request
+    return RunnableWithMessageHistory(
+        agent,
+        session_histories,
+        input_messages_key="input",
+        history_messages_key="chat_history",
+    )
+
+
+def build_brain():
+    global agent_executor, agent_with_memory
+    build_state.update(status="building", started_at=time.time())
+    print("--- Loading Brain in the background... ---")
+    try:
+        agent_executor = get_agent_executor(on_batch=_on_batch)
+        agent_with_memory = create_agent_with_memory(agent_executor)
+    except Exception as e:
+        build_state.update(status="failed", error=str(e), finished_at=time.time())
+        print(f"--- Brain failed to load: {e} ---")
+        return
+    build_state.update(status="ready", finished_at=time.time())
+    print("--- Brain Loaded! ---")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Every sync fallback LangChain runs under ainvoke (run_in_executor with
+    # no executor) lands in this bounded pool instead of an unbounded default
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=CHAT_THREADPOOL_SIZE, thread_name_prefix="chat")
+    )
+    threading.Thread(target=build_brain, name="brain-builder", daemon=True).start()
+    yield
+
+
+# 3. START THE APP
+app = FastAPI(title="Arati AI Portfolio API", version="1.0", lifespan=lifespan)
 
 
 # 4. DEFINE THE ENDPOINT (The Order Taker)
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
-    try:
-        # A. Setup Memory
-        def get_session_history(session_id: str):
-            return FileChatMessageHistory(f"./memory_api_{session_id}.json")
-
-        agent_with_memory = RunnableWithMessageHistory(
-            agent_executor,
-            get_session_history,
-            input_messages_key="input",
-            history_messages_key="chat_history",
+    # Fail fast while the index is still building
+    if agent_with_memory is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Index is {build_state['status']}, try again shortly.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
         )
 
-        # B. Run the Agent
-        config = {"configurable": {"session_id": request.session_id}}
-        result = agent_with_memory.invoke({"input": request.query}, config=config)
+    try:
+        # A. Run the Agent (async end to end, so one slow LLM call
+        #    never stalls the other requests on this worker)
+        #    The trace times every stage of the turn for /metrics
+        trace = RequestTrace("chat")
+        config = {
+            "configurable": {"session_id": request.session_id},
+            "callbacks": [trace],
+        }
+        with trace.track():
+            result = await agent_with_memory.ainvoke(
+                {"input": request.query}, config=config
+            )
+
+        # B. Structured, sampled trace of the turn (written off the request path)
+        log_agent_steps(result, session_id=request.session_id)
 
         # C. Return clean JSON
         return ChatResponse(answer=result["output"])
@@ -52,7 +147,167 @@ async def chat_endpoint(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# 5. HEALTH CHECK (Just to see if it's alive)
+# 4b. THE STREAMING ENDPOINT (Server-Sent Events)
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def event_to_sse(event):
+    """One astream_events (v2) event -> one SSE frame, or None to skip it."""
+    kind = event["event"]
+    if kind == "on_tool_start":
+        tool_input = event["data"].get("input")
+        return sse("tool_start", {"tool": event["name"], "input": tool_input})
+    if kind == "on_tool_end":
+        return sse("tool_end", {"tool": event["name"]})
+    if kind == "on_chat_model_stream":
+        token = event["data"]["chunk"].content
+        if token and isinstance(token, str):
+            return sse("token", {"text": token})
+    if kind == "on_chain_end" and not event["parent_ids"]:
+        # The outermost run finished, so the turn is already in the history
+        output = event["data"].get("output") or {}
+        return sse("end", {"answer": output.get("output", "")})
+    return None
+
+
+async def stream_agent(http_request, query, session_id):
+    """
+    Relays the agent's event stream as SSE: tool_start / tool_end while tools
+    run, token for every answer token, then end with the full answer (cached
+    and fast-path answers only send end). The agent runs in its own task, so
+    a client that disconnects cancels it, and with it the LLM call upstream.
+    """
+    frames = asyncio.Queue()
+    trace = RequestTrace("chat_stream")
+    config = {"configurable": {"session_id": session_id}, "callbacks": [trace]}
+
+    async def produce():
+        try:
+            with trace.track():
+                async for event in agent_with_memory.astream_events(
+                    {"input": query},
+                    config=config,
+                    version="v2",
+                    exclude_tags=[SUMMARY_TAG],  # history summaries are not the answer
+                ):
+                    if event["event"] == "on_chain_end" and not event["parent_ids"]:
+                        output = event["data"].get("output") or {}
+                        log_agent_steps(output, session_id=session_id)
+                    frame = event_to_sse(event)
+                    if frame:
+                        frames.put_nowait(frame)
+        except Exception as e:
+            frames.put_nowait(sse("error", {"detail": str(e)}))
+        finally:
+            frames.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                frame = await asyncio.wait_for(frames.get(), DISCONNECT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                # Nothing to send (a tool is running): is anyone still listening?
+                if await http_request.is_disconnected():
+                    print(f"   ! Stream for '{session_id}' closed by the client")
+                    break
+                continue
+            if frame is None:
+                break
+            yield frame
+    finally:
+        # No-op once the run is done; otherwise it stops the run mid-flight
+        producer.cancel()
+
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    if agent_with_memory is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Index is {build_state['status']}, try again shortly.",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    return StreamingResponse(
+        stream_agent(http_request, request.query, request.session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# 5. HEALTH CHECK (Liveness: the process is up, even while the index builds)
 @app.get("/health")
 def health_check():
     return {"status": "active", "model": "Agentic RAG"}
+
+
+# 6. READINESS CHECK (Only 200 once /chat can actually answer)
+@app.get("/ready")
+def readiness_check():
+    state = dict(build_state)
+    if state["started_at"]:
+        end = state["finished_at"] or time.time()
+        state["elapsed_s"] = round(end - state["started_at"], 1)
+    if state["status"] == "ready":
+        return state
+    return JSONResponse(
+        status_code=503,
+        content=state,
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+# 7. METRICS (Prometheus text format: request/stage latency, tokens, tool calls)
+def cache_stats():
+    caches = {
+        "retriever": retriever_cache.shared_cache.stats(),
+        "web_search": web_search.shared_cache.stats(),
+    }
+    if rag_core.answer_cache is not None:
+        caches["answer"] = rag_core.answer_cache.stats()
+    return {
+        (cache, field): stats[field]
+        for cache, stats in caches.items()
+        for field in ("hits", "misses", "entries")
+    }
+
+
+REGISTRY.register(
+    GaugeFunction(
+        "rag_cache", "Process-wide cache counters.", ["cache", "field"], cache_stats
+    )
+)
+
+
+def fast_path_stats():
+    if rag_core.fast_path is None:
+        return {}
+    return {
+        (path, field): value
+        for path, stats in rag_core.fast_path.stats().items()
+        for field, value in stats.items()
+    }
+
+
+REGISTRY.register(
+    GaugeFunction(
+        "rag_fastpath",
+        "Requests and average latency (ms) answered by the Q&A fast path vs the agent.",
+        ["path", "field"],
+        fast_path_stats,
+    )
+)
+REGISTRY.register(
+    GaugeFunction(
+        "rag_ingest_chunks_embedded",
+        "Chunks embedded by the current index build.",
+        [],
+        lambda: {(): build_state["chunks_embedded"]},
+    )
+)
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
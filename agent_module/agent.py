@@ -1,36 +1,40 @@
 import os
 import sys
+import time
 import config
 import chromadb
 
 # 1. IMPORTS
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    CSVLoader,
-    Docx2txtLoader,
-)
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from agent_module.loaders import list_source_files
+from agent_module.pipeline import ingest_documents
+from agent_module.chunking import get_text_splitter
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
+from agent_module.embeddings import get_embedding_model
 
 # Tools
 from langchain_core.tools import create_retriever_tool
-from langchain_community.tools import DuckDuckGoSearchRun
+from agent_module.web_search import get_web_search_tool
 
 # Agent & Memory
-try:
-    from langchain_classic.agents import create_tool_calling_agent
-    from langchain_classic.agents.agent import AgentExecutor
-except Exception:
-    from langchain.agents import AgentExecutor
-
-    raise ImportError(
-        "Required agent API not found in installed langchain packages. Please install 'langchain-classic' or upgrade langchain to a compatible version."
-    )
-
+from langchain_classic.agents import create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_community.chat_message_histories import FileChatMessageHistory
+from agent_module.history_store import SQLiteChatMessageHistory
+from agent_module.history_policy import HistoryWindow
+from agent_module.answer_cache import AnswerCache
+from agent_module.qa_fastpath import QAFastPath
+from agent_module.indexing import index_version
+from agent_module.snapshot import (
+    INDEX_SNAPSHOT_ENABLED,
+    load_snapshot,
+    save_snapshot,
+    source_fingerprint,
+)
+from agent_module.parallel_executor import ParallelAgentExecutor
+
+# log_agent_steps now lives in trace_log; app.py still imports it from here
+from agent_module.trace_log import AGENT_VERBOSE, log_agent_steps
+from agent_module.lexical_index import BM25Index, HybridRetriever
 from langchain_core.runnables.history import RunnableWithMessageHistory
 import tempfile
 
@@ -39,56 +43,72 @@ DATA_FOLDER = "assets/"
 
 
 # --- PART 1: KNOWLEDGE BASE ---
-def setup_vectorstore():
+def setup_vectorstore(embedding_model=None):
+    # embedding_model: any Embeddings (benchmarks pass an offline fake)
     print(f"--- 1. Scanning '{DATA_FOLDER}' ---")
-    all_docs = []
-
-    for root, dirs, files in os.walk(DATA_FOLDER):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_ext = os.path.splitext(file)[1].lower()
-            loader = None
-            try:
-                if file_ext == ".pdf":
-                    loader = PyPDFLoader(file_path)
-                elif file_ext == ".docx":
-                    loader = Docx2txtLoader(file_path)
-                elif file_ext == ".csv":
-                    loader = CSVLoader(file_path)
-                elif file_ext in [".txt", ".py", ".sh", ".md", ".json", ".java"]:
-                    loader = TextLoader(file_path)
-
-                if loader:
-                    print(f"   > Loading: {file}")
-                    all_docs.extend(loader.load())
-            except Exception as e:
-                print(f"   ! Skipping {file} due to error: {e}")
-
-        if not all_docs:
-            raise ValueError("No valid documents found in assets folder")
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    splits = text_splitter.split_documents(all_docs)
-
-    embedding_model = OpenAIEmbeddings()
-
+    file_paths = list_source_files(DATA_FOLDER)
+    if not file_paths:
+        raise ValueError("No valid documents found in assets folder")
+
+    # Format-aware: Q&A pairs, Markdown sections, functions and CSV rows stay whole
+    text_splitter = get_text_splitter()
+    embedding_model = embedding_model or get_embedding_model()
+    chroma_client = chromadb.EphemeralClient()
+    vectorstore = Chroma(client=chroma_client, embedding_function=embedding_model)
+
+    # Same sources, splitter and model as last time: reload the saved index
+    # instead of re-splitting and re-embedding everything
+    fingerprint = None
+    if INDEX_SNAPSHOT_ENABLED:
+        fingerprint = source_fingerprint(
+            DATA_FOLDER, file_paths, text_splitter, embedding_model
+        )
+        start = time.perf_counter()
+        chunk_count = load_snapshot(vectorstore, fingerprint)
+        if chunk_count:
+            elapsed = (time.perf_counter() - start) * 1000
+            print(
+                f"   > Index snapshot loaded: {chunk_count} chunks in {elapsed:.0f} ms"
+            )
+            return vectorstore
+
+    # Streams load -> split -> embed -> upsert in fixed-size batches,
+    # so memory stays flat and the collection fills up as we go
     try:
-        chroma_client = chromadb.EphemeralClient()
-        vectorstore = Chroma.from_documents(
-            documents=splits,
-            embedding=embedding_model,
-            client=chroma_client,
+        chunk_count = ingest_documents(
+            vectorstore, DATA_FOLDER, file_paths, text_splitter
         )
     except Exception as e:
         raise RuntimeError(f"Vector DB failed: {str(e)}")
+
+    if not chunk_count:
+        raise ValueError("No valid documents found in assets folder")
+
+    if fingerprint:
+        try:
+            save_snapshot(vectorstore, fingerprint)
+        except OSError as e:
+            print(f"   ! Could not save index snapshot: {e}")
+
+    print(f"   > Embedding cache: {embedding_model.stats()}")
     return vectorstore
 
 
 # --- PART 2: CREATE THE AGENT ---
-def create_agent_system(vectorstore):
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+def create_agent_system(vectorstore, llm=None, search_backend=None):
+    # llm / search_backend default to OpenAI / DuckDuckGo (benchmarks pass fakes)
+    # streaming=True so the Streamlit app can render tokens as they arrive
+    llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0, streaming=True)
+
+    # BM25 + vector search (exact names/tools are found lexically), fused with
+    # RRF; same query, same k, same index -> served from the shared result cache
+    version = index_version(vectorstore)
+    retriever = HybridRetriever(
+        vectorstore=vectorstore,
+        lexical=BM25Index.from_vectorstore(vectorstore),
+        k=5,
+        index_version=version,
+    )
     rag_tool = create_retriever_tool(
         retriever,
         "search_my_files",
@@ -97,7 +117,8 @@ def create_agent_system(vectorstore):
         "Never skip this tool. Never answer from memory. Always search first.",
     )
 
-    web_tool = DuckDuckGoSearchRun()
+    # Cached, deadline-bounded and concurrency-limited DuckDuckGo search
+    web_tool = get_web_search_tool(search_backend)
     tools = [rag_tool, web_tool]
 
     prompt = ChatPromptTemplate.from_messages(
@@ -128,40 +149,33 @@ def create_agent_system(vectorstore):
     )
 
     agent = create_tool_calling_agent(llm, tools, prompt)
-    agent_executor = AgentExecutor(
+    # Several tool calls in one step run side by side, in the original order
+    agent_executor = ParallelAgentExecutor(
         agent=agent,
         tools=tools,
-        verbose=True,
+        verbose=AGENT_VERBOSE,
         return_intermediate_steps=True,
         handle_parsing_errors=True,
     )
-    return agent_executor
+    # Long sessions: recent turns verbatim, older ones as a rolling summary
+    agent_system = HistoryWindow("chat_history", summarizer=llm).wrap(agent_executor)
+
+    # Repeated first-turn questions are answered from cache, skipping the agent
+    answer_cache = AnswerCache(vectorstore.embeddings)
+    agent_system = answer_cache.wrap(agent_system)
+
+    # Curated Q&A pairs are returned as-is, with no LLM call at all
+    fast_path = QAFastPath.from_folder(DATA_FOLDER, vectorstore.embeddings)
+    return fast_path.wrap(agent_system)
 
 
 # --- PART 3: MEMORY ---
 def get_session_history(session_id: str):
-    return FileChatMessageHistory(
-        os.path.join(tempfile.gettempdir(), f"memory_{session_id}.json")
+    return SQLiteChatMessageHistory(
+        session_id, os.path.join(tempfile.gettempdir(), "chat_history.sqlite")
     )
 
 
-# --- TERMINAL LOGGING HELPER (called from app.py too) ---
-def log_agent_steps(response):
-    steps = response.get("intermediate_steps", [])
-    if steps:
-        print("\n" + "=" * 60)
-        print("🧠 AGENT REASONING STEPS:")
-        print("=" * 60)
-        for i, (action, observation) in enumerate(steps, 1):
-            print(f"\n🔧 Step {i} — Tool     : {action.tool}")
-            print(f"📥 Query              : {action.tool_input}")
-            print(f"📤 Retrieved Context  :\n{observation}")
-            print("-" * 60)
-    else:
-        print("\n⚠️  No tool was called — agent answered from memory.")
-    print(f"\n💬 Final Answer:\n{response['output']}\n")
-
-
 # --- MAIN (for running directly via: python agent.py) ---
 if __name__ == "__main__":
     vectorstore = setup_vectorstore()
@@ -183,4 +197,5 @@ if __name__ == "__main__":
             break
 
         response = final_bot.invoke({"input": user_input}, config=run_config)
-        log_agent_steps(response)
+        log_agent_steps(response, session_id="dhamu")
+        print(f"\nTwin: {response['output']}")
@@ -0,0 +1,171 @@
+import os
+import time
+import asyncio
+import threading
+
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+
+from agent_module.embeddings import normalize_text
+from agent_module.trace_log import log_event, truncate
+
+# --- CONFIGURATION ---
+# Cosine similarity a new query needs to reuse a stored answer
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "500"))
+
+
+class AnswerCache:
+    """
+    Semantic cache of final answers, keyed by query embedding.
+    Only turns with no history take part: a query close enough (cosine >=
+    threshold) to an earlier first-turn query gets the stored answer back
+    without running the agent. Any later turn may depend on its session's
+    history, which other sessions must never see, so it is neither served
+    nor stored. Entries expire after ttl_seconds and the oldest go first
+    beyond max_entries. A cache belongs to one built agent: a rebuilt index
+    comes with a new, empty cache.
+    """
+
+    def __init__(
+        self,
+        embedding,
+        threshold=ANSWER_CACHE_THRESHOLD,
+        ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+        max_entries=ANSWER_CACHE_SIZE,
+    ):
+        self.embedding = embedding
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._vectors = np.zeros((0, 0), dtype=np.float32)  # unit rows
+        self._entries = []  # (query, answer, created_at), same order as rows
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.seconds_saved = 0.0
+        self._miss_seconds = None  # moving average of a full agent run
+
+    # --- PART 1: THE STORE ---
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._entries = []
+
+    def _expire(self, now):
+        # Entries are appended in time order, so expired ones are a prefix
+        keep = 0
+        while (
+            keep < len(self._entries)
+            and now - self._entries[keep][2] > self.ttl_seconds
+        ):
+            keep += 1
+        over = len(self._entries) - keep - self.max_entries
+        keep += max(0, over)
+        if keep:
+            self._vectors = self._vectors[keep:]
+            self._entries = self._entries[keep:]
+
+    def _embed(self, query):
+        vector = np.asarray(self.embedding.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector):
+        with self._lock:
+            self._expire(time.time())
+            if not self._entries:
+                return None
+            scores = self._vectors @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            return self._entries[best][1]
+
+    def store(self, vector, query, answer):
+        with self._lock:
+            if not len(self._entries):
+                self._vectors = vector[None, :]
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._entries.append((query, answer, time.time()))
+            self._expire(time.time())
+
+    # --- PART 2: THE RUNNABLE WRAPPER ---
+    def _record_hit(self, elapsed):
+        with self._lock:
+            self.hits += 1
+            if self._miss_seconds is not None:
+                self.seconds_saved += max(0.0, self._miss_seconds - elapsed)
+
+    def _record_run(self, elapsed, counted):
+        with self._lock:
+            self.misses += counted
+            if self._miss_seconds is None:
+                self._miss_seconds = elapsed
+            else:
+                self._miss_seconds = 0.9 * self._miss_seconds + 0.1 * elapsed
+
+    def wrap(self, runnable, input_key="input", history_key="chat_history"):
+        """
+        Returns runnable with the cache in front of it. Output keeps the
+        runnable's shape ({"output": ...}) plus "cached": True on a hit.
+        """
+
+        def before(inputs):
+            query = normalize_text(inputs[input_key])
+            if inputs.get(history_key):
+                with self._lock:
+                    self.skipped += 1
+                return query, None, None
+            vector = self._embed(query)
+            return query, vector, self.lookup(vector)
+
+        def after(query, vector, result, start):
+            self._record_run(time.perf_counter() - start, vector is not None)
+            answer = result.get("output") if isinstance(result, dict) else None
+            if vector is not None and answer:
+                self.store(vector, query, answer)
+            return result
+
+        def invoke(inputs, config):
+            start = time.perf_counter()
+            query, vector, answer = before(inputs)
+            if answer is not None:
+                self._record_hit(time.perf_counter() - start)
+                log_event("answer_cache_hit", query=truncate(query, 60), **self.stats())
+                return {**inputs, "output": answer, "cached": True}
+            result = runnable.invoke(inputs, config)
+            return after(query, vector, result, start)
+
+        async def ainvoke(inputs, config):
+            start = time.perf_counter()
+            # Embedding the query is a blocking HTTP call: keep it off the loop
+            loop = asyncio.get_running_loop()
+            query, vector, answer = await loop.run_in_executor(None, before, inputs)
+            if answer is not None:
+                self._record_hit(time.perf_counter() - start)
+                log_event("answer_cache_hit", query=truncate(query, 60), **self.stats())
+                return {**inputs, "output": answer, "cached": True}
+            result = await runnable.ainvoke(inputs, config)
+            return after(query, vector, result, start)
+
+        return RunnableLambda(invoke, afunc=ainvoke, name="AnswerCache")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "seconds_saved": round(self.seconds_saved, 3),
+        }
@@ -0,0 +1,132 @@
+import os
+import re
+
+from langchain_core.documents import Document
+from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+# --- CONFIGURATION ---
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+# Structured splits (Q&A, headings, functions, rows) need no overlap;
+# free-form prose (PDFs, plain text) keeps a little
+PROSE_CHUNK_OVERLAP = int(os.getenv("PROSE_CHUNK_OVERLAP", "100"))
+
+QA_QUESTION = re.compile(r"^Q:", re.MULTILINE)
+HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
+RULE = re.compile(r"^\s*(---+|\*\*\*+)\s*$")
+
+
+# --- PART 1: ONE SPLIT PER FORMAT ---
+def split_qa(text):
+    """One chunk per Q:/A: pair; '# SECTION' headings travel with their pairs."""
+    blocks = []
+    section = ""
+    current = []
+
+    def flush():
+        body = "\n".join(current).strip()
+        if body:
+            blocks.append((section, body))
+
+    for line in text.splitlines():
+        heading = HEADING.match(line.strip())
+        if line.startswith("Q:") or heading or RULE.match(line):
+            flush()
+            current = []
+            if heading:
+                section = heading.group(2)
+                continue
+            if RULE.match(line):
+                continue
+        current.append(line)
+    flush()
+    return [f"{section}\n{body}" if section else body for section, body in blocks]
+
+
+def split_markdown(text):
+    """One chunk per heading section, prefixed with its heading path."""
+    sections = []
+    path = []
+    current = []
+
+    def flush():
+        body = "\n".join(current).strip()
+        if body:
+            sections.append("\n".join([" > ".join(path), body]) if path else body)
+
+    for line in text.splitlines():
+        heading = HEADING.match(line)
+        if heading:
+            flush()
+            current = []
+            level = len(heading.group(1))
+            path = path[: level - 1] + [heading.group(2)]
+            continue
+        current.append(line)
+    flush()
+    return sections
+
+
+def get_format(file_path, text):
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext == ".csv":
+        return "rows"
+    if file_ext == ".md":
+        return "markdown"
+    if file_ext == ".py":
+        return "python"
+    if file_ext == ".txt" and len(QA_QUESTION.findall(text)) >= 2:
+        return "qa"
+    return "prose"
+
+
+# --- PART 2: THE SPLITTER ---
+class StructuredSplitter:
+    """
+    Drop-in for RecursiveCharacterTextSplitter.split_documents, routed by file
+    extension like the loaders: Q&A files split on Q: boundaries, Markdown on
+    headings, Python on class/def boundaries, and CSV rows (already one
+    document each from CSVLoader) stay whole. Pieces bigger than chunk_size
+    and everything else fall back to the recursive splitter.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, prose_overlap=PROSE_CHUNK_OVERLAP):
+        self.chunk_size = chunk_size
+        self.prose = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=prose_overlap
+        )
+        self.python = RecursiveCharacterTextSplitter.from_language(
+            Language.PYTHON, chunk_size=chunk_size, chunk_overlap=0
+        )
+        # Stored in the index manifest: a new splitter means a re-index
+        self.signature = f"structured-v1:{chunk_size}:{prose_overlap}"
+
+    def _pieces(self, fmt, text):
+        if fmt == "qa":
+            return split_qa(text)
+        if fmt == "markdown":
+            return split_markdown(text)
+        if fmt == "python":
+            return self.python.split_text(text)
+        if fmt == "rows":
+            return [text]
+        return self.prose.split_text(text)
+
+    def split_documents(self, docs):
+        chunks = []
+        for doc in docs:
+            fmt = get_format(doc.metadata.get("source", ""), doc.page_content)
+            for piece in self._pieces(fmt, doc.page_content):
+                texts = (
+                    self.prose.split_text(piece)
+                    if len(piece) > self.chunk_size
+                    else [piece]
+                )
+                for text in texts:
+                    if text.strip():
+                        metadata = dict(doc.metadata, chunk_format=fmt)
+                        chunks.append(Document(page_content=text, metadata=metadata))
+        return chunks
+
+
+def get_text_splitter():
+    return StructuredSplitter()
@@ -0,0 +1,154 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+from agent_module.tokens import count_tokens
+
+# --- CONFIGURATION ---
+# Estimated Jaccard similarity (of word 3-gram sets) above which a chunk is a duplicate
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") != "0"
+MINHASH_PERMUTATIONS = 128
+# 32 bands x 4 rows: pairs above ~0.45 similarity almost always share a bucket,
+# and every candidate is then checked against DEDUP_THRESHOLD
+LSH_BANDS = 32
+SHINGLE_WORDS = 3
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+WORD = re.compile(r"\w+")
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    words = WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from universal hashing (a * h + b) mod p, vectorized."""
+
+    def __init__(self, num_perm=MINHASH_PERMUTATIONS, seed=1):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64
+        )
+        # a * h wraps around 2^64 on purpose: that is what mixes the bits
+        with np.errstate(over="ignore"):
+            products = (hashes[:, None] * self.a + self.b) % _MERSENNE_PRIME
+        # Every value fits 32 bits: half the memory per kept chunk
+        return (products & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+class ChunkDeduper:
+    """
+    Near-duplicate filter that sits between splitting and embedding.
+    Each chunk gets a MinHash signature; LSH buckets find earlier chunks that
+    might be similar, and the ones whose estimated Jaccard similarity reaches
+    threshold are dropped. The kept chunk remembers every source it stands
+    for (metadata "sources"), so nothing is lost from citations.
+    Only signatures, ids and sources are held, never the chunk text.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, bands=LSH_BANDS):
+        self.threshold = threshold
+        self.hasher = MinHasher()
+        self.bands = bands
+        self.rows = MINHASH_PERMUTATIONS // bands
+        self._buckets = [{} for _ in range(bands)]
+        self._kept = []  # (signature, chunk id, source) of every kept chunk
+        self._sources = {}  # position -> sources, for kept chunks that absorbed others
+        self.chunks_removed = 0
+        self.tokens_removed = 0
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            rows = signature[band * self.rows : (band + 1) * self.rows]
+            # An int key is smaller than the bytes; a collision only adds a
+            # candidate, which is then checked against threshold anyway
+            yield band, hash(rows.tobytes())
+
+    def _find_duplicate(self, signature):
+        seen = set()
+        for band, key in self._band_keys(signature):
+            positions = self._buckets[band].get(key, ())
+            for position in (positions,) if type(positions) is int else positions:
+                if position in seen:
+                    continue
+                seen.add(position)
+                similarity = np.mean(self._kept[position][0] == signature)
+                if similarity >= self.threshold:
+                    return position
+        return None
+
+    def filter(self, chunks, ids):
+        """Returns (chunks, ids) without the near-duplicates of anything seen so far."""
+        kept_chunks, kept_ids = [], []
+        for chunk, chunk_id in zip(chunks, ids):
+            signature = self.hasher.signature(chunk.page_content)
+            source = chunk.metadata.get("source", "")
+            duplicate = self._find_duplicate(signature)
+            if duplicate is not None:
+                kept_source = self._kept[duplicate][2]
+                sources = self._sources.setdefault(
+                    duplicate, [kept_source] if kept_source else []
+                )
+                if source and source not in sources:
+                    sources.append(source)
+                self.chunks_removed += 1
+                self.tokens_removed += count_tokens(chunk.page_content)
+                continue
+
+            position = len(self._kept)
+            self._kept.append((signature, chunk_id, source))
+            for band, key in self._band_keys(signature):
+                # Most buckets hold one chunk: a bare position, a list after that
+                bucket = self._buckets[band]
+                existing = bucket.get(key)
+                if existing is None:
+                    bucket[key] = position
+                elif type(existing) is int:
+                    bucket[key] = [existing, position]
+                else:
+                    existing.append(position)
+            kept_chunks.append(chunk)
+            kept_ids.append(chunk_id)
+        return kept_chunks, kept_ids
+
+    def merged(self):
+        """{chunk id: {"sources": ...}} for kept chunks that absorbed chunks of other files."""
+        return {
+            self._kept[position][1]: {"sources": ", ".join(sources)}
+            for position, sources in self._sources.items()
+            if len(sources) > 1
+        }
+
+    def groups(self):
+        """Lists of sources whose chunks were merged into one (for sync to link them)."""
+        return [sources for sources in self._sources.values() if len(sources) > 1]
+
+    def apply_sources(self, vectorstore, reset_ids=()):
+        """
+        Writes the merged source lists onto the already-upserted chunks.
+        reset_ids had a source list before and lose it unless merged again.
+        """
+        merged = self.merged()
+        updates = {chunk_id: {"sources": None} for chunk_id in reset_ids}
+        updates.update(merged)
+        if updates:
+            # Chroma merges metadata keys: only "sources" changes
+            vectorstore._collection.update(
+                ids=list(updates), metadatas=list(updates.values())
+            )
+        if self.chunks_removed:
+            print(
+                f"   > Dedup: removed {self.chunks_removed} near-duplicate chunks "
+                f"({self.tokens_removed} tokens), {len(merged)} chunks now list several sources"
+            )
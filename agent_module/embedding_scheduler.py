@@ -0,0 +1,181 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+from langchain_core.embeddings import Embeddings
+
+from agent_module.tokens import get_encoding
+
+# --- CONFIGURATION ---
+# Tokens packed into one request (OpenAI allows up to 300k / 2048 inputs)
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "8000"))
+EMBED_BATCH_MAX_TEXTS = int(os.getenv("EMBED_BATCH_MAX_TEXTS", "512"))
+# Requests allowed on the wire at the same time
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# Account limit for the embedding model (tier 1 for text-embedding-3-small)
+EMBED_TOKENS_PER_MINUTE = int(os.getenv("EMBED_TOKENS_PER_MINUTE", "1000000"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "6"))
+
+
+# --- PART 1: THE RATE LIMITER ---
+class TokenRateLimiter:
+    """Token bucket: refills tokens_per_minute / 60 every second, bursts up to a minute."""
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.available = float(tokens_per_minute)
+        self.waited = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        # A single oversized request can never fit, so it waits for a full bucket
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(
+                    self.capacity, self.available + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                wait = (tokens - self.available) / self.rate
+                self.waited += wait
+            time.sleep(wait)
+
+
+def is_retryable(error):
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After header), if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# --- PART 2: THE SCHEDULER ---
+class ScheduledEmbeddings(Embeddings):
+    """
+    Wraps an embedding model so that embed_documents:
+    packs texts into token-budgeted batches (counted with tiktoken),
+    sends up to `concurrency` batches at once under a tokens-per-minute limiter,
+    and retries 429/5xx/connection errors with exponential backoff + jitter.
+    The underlying model should be built with max_retries=0 so we own retries.
+    """
+
+    def __init__(
+        self,
+        underlying,
+        batch_tokens=EMBED_BATCH_TOKENS,
+        batch_max_texts=EMBED_BATCH_MAX_TEXTS,
+        concurrency=EMBED_CONCURRENCY,
+        tokens_per_minute=EMBED_TOKENS_PER_MINUTE,
+        max_retries=EMBED_MAX_RETRIES,
+        base_delay=0.5,
+        max_delay=30.0,
+    ):
+        self.underlying = underlying
+        # Exposed so the embedding cache keys on the real model name
+        self.model = getattr(underlying, "model", None)
+        self.dimensions = getattr(underlying, "dimensions", None)
+        self.batch_tokens = batch_tokens
+        self.batch_max_texts = batch_max_texts
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = TokenRateLimiter(tokens_per_minute)
+        self.encoding = get_encoding(self.model)
+
+        self.requests = 0
+        self.retries = 0
+        self.tokens = 0
+        self._lock = threading.Lock()
+        # One pool per model, so nested callers (several ingest threads)
+        # still share the same concurrency budget
+        self._pool = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="embed"
+        )
+
+    def make_batches(self, texts):
+        """Greedy packing into (indices, token_count) batches, in input order."""
+        batches = []
+        indices, budget = [], 0
+        for i, text in enumerate(texts):
+            tokens = max(1, len(self.encoding.encode(text, disallowed_special=())))
+            full = budget + tokens > self.batch_tokens
+            if indices and (full or len(indices) >= self.batch_max_texts):
+                batches.append((indices, budget))
+                indices, budget = [], 0
+            indices.append(i)
+            budget += tokens
+        if indices:
+            batches.append((indices, budget))
+        return batches
+
+    def _call(self, fn, payload, tokens):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(tokens)
+            try:
+                result = fn(payload)
+                with self._lock:
+                    self.requests += 1
+                    self.tokens += tokens
+                return result
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                with self._lock:
+                    self.retries += 1
+                # Jitter, so throttled workers don't retry in lockstep
+                server_delay = retry_after(e)
+                if server_delay is not None:
+                    time.sleep(server_delay + random.uniform(0, self.base_delay))
+                else:
+                    backoff = min(self.max_delay, self.base_delay * (2**attempt))
+                    time.sleep(random.uniform(0.5, 1.0) * backoff)
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        batches = self.make_batches(texts)
+        futures = [
+            self._pool.submit(
+                self._call,
+                self.underlying.embed_documents,
+                [texts[i] for i in indices],
+                tokens,
+            )
+            for indices, tokens in batches
+        ]
+
+        vectors = [None] * len(texts)
+        for (indices, _), future in zip(batches, futures):
+            for i, vector in zip(indices, future.result()):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text):
+        tokens = len(self.encoding.encode(text, disallowed_special=()))
+        return self._call(self.underlying.embed_query, text, tokens)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "tokens": self.tokens,
+            "throttled_s": round(self.limiter.waited, 2),
+        }
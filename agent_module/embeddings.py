@@ -0,0 +1,178 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from agent_module.embedding_scheduler import ScheduledEmbeddings
+
+# --- CONFIGURATION ---
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", os.path.join(ROOT_DIR, ".cache", "embeddings.sqlite")
+)
+# ~6 KB per entry for text-embedding-ada-002 / 3-small, so ~120 MB at the cap
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "20000"))
+
+# SQLite caps the number of "?" parameters per statement
+_SQL_BATCH = 500
+
+
+def normalize_text(text):
+    # Same text with different unicode forms / stray whitespace = same embedding
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Drop-in wrapper around any LangChain embedding model.
+    Vectors are stored in SQLite keyed by (model name, normalized text hash),
+    so unchanged chunks and repeated queries never reach the provider.
+    The store is capped at max_entries and evicts least-recently-used rows.
+    """
+
+    def __init__(
+        self,
+        underlying,
+        path=EMBEDDING_CACHE_PATH,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+        model_name=None,
+    ):
+        self.underlying = underlying
+        self.path = path
+        self.max_entries = max_entries
+        self.model_name = model_name or _model_name(underlying)
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used"
+            " ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._count = self._count_rows()
+
+    # --- PART 1: KEYS & STORAGE ---
+    def _count_rows(self):
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _key(self, text):
+        payload = f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _lookup(self, keys):
+        found = {}
+        now = time.time()
+        for i in range(0, len(keys), _SQL_BATCH):
+            batch = keys[i : i + _SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = array("f", blob).tolist()
+            if rows:
+                # Touch the hits so LRU eviction keeps them around
+                self._conn.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE key IN ({marks})",
+                    [now] + batch,
+                )
+        return found
+
+    def _store(self, items):
+        now = time.time()
+        cursor = self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            [(key, array("f", vector).tobytes(), now) for key, vector in items],
+        )
+        self._count += cursor.rowcount
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                " SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._count = self._count_rows()
+
+    # --- PART 2: THE EMBEDDINGS INTERFACE ---
+    def embed_documents(self, texts):
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            cached = self._lookup(list(set(keys)))
+            self._conn.commit()
+
+        # Every distinct missing text is embedded exactly once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = list(zip(missing.keys(), vectors))
+            cached.update(fresh)
+            with self._lock:
+                self._store(fresh)
+                self._conn.commit()
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text):
+        key = self._key(text)
+
+        with self._lock:
+            cached = self._lookup([key])
+            self._conn.commit()
+        if key in cached:
+            self.hits += 1
+            return cached[key]
+
+        self.misses += 1
+        vector = self.underlying.embed_query(text)
+        with self._lock:
+            self._store([(key, vector)])
+            self._conn.commit()
+        return vector
+
+    # --- PART 3: REPORTING ---
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": self._count,
+        }
+
+
+def _model_name(embedding):
+    name = getattr(embedding, "model", None) or type(embedding).__name__
+    dimensions = getattr(embedding, "dimensions", None)
+    return f"{name}:{dimensions}" if dimensions else name
+
+
+def get_embedding_model():
+    """The one place every entry point gets its embedding model from."""
+    # Cache first, so only misses reach the scheduler (which owns retries)
+    return CachedEmbeddings(ScheduledEmbeddings(OpenAIEmbeddings(max_retries=0)))
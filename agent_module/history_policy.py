@@ -0,0 +1,166 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from langchain_core.messages import SystemMessage, get_buffer_string
+from langchain_core.runnables import RunnableLambda
+
+from agent_module.sessions import SESSION_CACHE_SIZE
+from agent_module.tokens import count_tokens
+from agent_module.trace_log import log_event
+
+# --- CONFIGURATION ---
+# Prompt tokens the injected chat history may use on each LLM call
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+# Role/framing tokens OpenAI adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Tag on summary LLM calls, so streaming clients can leave them out
+SUMMARY_TAG = "history_summary"
+
+SUMMARY_PROMPT = (
+    "Progressively summarize the conversation below, adding onto the previous "
+    "summary and returning a new summary. Keep names, projects, facts and any "
+    "open questions. Be brief.\n\n"
+    "Current summary:\n{summary}\n\n"
+    "New lines of conversation:\n{new_lines}\n\n"
+    "New summary:"
+)
+
+
+def message_tokens(message, model=None):
+    return count_tokens(str(message.content), model) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _fingerprint(message):
+    return hashlib.sha1(
+        f"{message.type}\0{message.content}".encode("utf-8")
+    ).hexdigest()
+
+
+class HistoryWindow:
+    """
+    Keeps the injected chat history under a token budget.
+    The newest messages that fit are passed through as-is; everything older is
+    compacted into a rolling summary (one short system message). The summary is
+    cached per session and only extended when the window moves past new messages.
+    """
+
+    def __init__(
+        self,
+        history_key="chat_history",
+        token_budget=HISTORY_TOKEN_BUDGET,
+        summarizer=None,
+        model="gpt-4o-mini",
+    ):
+        self.history_key = history_key
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.model = model
+        self.requests = 0
+        self.tokens_saved = 0
+        # session_id -> (fingerprint of the last summarized message, summary)
+        self._summaries = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- PART 1: THE WINDOW ---
+    def split(self, messages):
+        """Returns (older, recent, full_token_count): recent is what fits the budget."""
+        sizes = [message_tokens(message, self.model) for message in messages]
+        used = 0
+        cut = len(messages)
+        while cut > 0 and used + sizes[cut - 1] <= self.token_budget:
+            used += sizes[cut - 1]
+            cut -= 1
+        return messages[:cut], messages[cut:], sum(sizes)
+
+    # --- PART 2: THE ROLLING SUMMARY ---
+    def _pending(self, session_id, older):
+        """What still needs summarizing: (previous summary, new messages)."""
+        with self._lock:
+            cached = self._summaries.get(session_id)
+        if cached:
+            marker, summary = cached
+            for i in range(len(older) - 1, -1, -1):
+                if _fingerprint(older[i]) == marker:
+                    return summary, older[i + 1 :]
+        return "", older
+
+    def _remember(self, session_id, older, summary):
+        with self._lock:
+            self._summaries.pop(session_id, None)
+            self._summaries[session_id] = (_fingerprint(older[-1]), summary)
+            while len(self._summaries) > SESSION_CACHE_SIZE:
+                self._summaries.popitem(last=False)
+
+    def _summary_prompt(self, summary, new_messages):
+        return SUMMARY_PROMPT.format(
+            summary=summary or "(none)", new_lines=get_buffer_string(new_messages)
+        )
+
+    def summarize(self, session_id, older):
+        summary, new_messages = self._pending(session_id, older)
+        if new_messages and self.summarizer is not None:
+            try:
+                prompt = self._summary_prompt(summary, new_messages)
+                summary = self.summarizer.invoke(
+                    prompt, {"tags": [SUMMARY_TAG]}
+                ).content
+            except Exception as e:
+                # A failed summary just means a shorter memory, never a failed turn
+                print(f"   ! History summary failed: {e}")
+                return summary
+            self._remember(session_id, older, summary)
+        return summary
+
+    async def asummarize(self, session_id, older):
+        summary, new_messages = self._pending(session_id, older)
+        if new_messages and self.summarizer is not None:
+            try:
+                prompt = self._summary_prompt(summary, new_messages)
+                summary = (
+                    await self.summarizer.ainvoke(prompt, {"tags": [SUMMARY_TAG]})
+                ).content
+            except Exception as e:
+                print(f"   ! History summary failed: {e}")
+                return summary
+            self._remember(session_id, older, summary)
+        return summary
+
+    # --- PART 3: THE RUNNABLE STEP ---
+    def _finish(self, inputs, recent, summary, full_tokens):
+        window = list(recent)
+        if summary:
+            window.insert(
+                0,
+                SystemMessage(
+                    content=f"Summary of the earlier conversation: {summary}"
+                ),
+            )
+        saved = max(0, full_tokens - sum(message_tokens(m, self.model) for m in window))
+        with self._lock:
+            self.requests += 1
+            self.tokens_saved += saved
+        if saved:
+            log_event("history_window", recent_messages=len(recent), tokens_saved=saved)
+        return {**inputs, self.history_key: window, "history_tokens_saved": saved}
+
+    def prepare(self, inputs, config):
+        older, recent, full_tokens = self.split(inputs.get(self.history_key) or [])
+        session_id = config.get("configurable", {}).get("session_id", "default")
+        summary = self.summarize(session_id, older) if older else ""
+        return self._finish(inputs, recent, summary, full_tokens)
+
+    async def aprepare(self, inputs, config):
+        older, recent, full_tokens = self.split(inputs.get(self.history_key) or [])
+        session_id = config.get("configurable", {}).get("session_id", "default")
+        summary = await self.asummarize(session_id, older) if older else ""
+        return self._finish(inputs, recent, summary, full_tokens)
+
+    def wrap(self, runnable):
+        """Returns runnable with the history trimmed/compacted before every call."""
+        step = RunnableLambda(self.prepare, afunc=self.aprepare, name="HistoryWindow")
+        return step | runnable
+
+    def stats(self):
+        return {"requests": self.requests, "tokens_saved": self.tokens_saved}
@@ -0,0 +1,126 @@
+import os
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+from agent_module.metrics import timed
+
+# --- CONFIGURATION ---
+# How many of the most recent messages a session reads back (0 = all)
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "50"))
+HISTORY_POOL_SIZE = int(os.getenv("HISTORY_POOL_SIZE", "8"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+"""
+
+
+# --- PART 1: CONNECTION POOL ---
+class SQLitePool:
+    """A small pool of WAL-mode connections to one database file."""
+
+    def __init__(self, db_path, size=HISTORY_POOL_SIZE):
+        self.db_path = db_path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        # WAL: readers never block the writer, and appends are cheap
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                with conn:  # commit on success, rollback on error
+                    yield conn
+            finally:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path):
+    db_path = os.path.abspath(db_path)
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = SQLitePool(db_path)
+        return _pools[db_path]
+
+
+# --- PART 2: THE HISTORY ---
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """
+    Chat history in one shared SQLite file instead of one JSON file per session.
+    Appending a turn is a single INSERT (O(1), no matter how long the session is),
+    and reads fetch only the last max_messages rows through the (session_id, id)
+    index. Concurrent turns on the same session are serialized by SQLite,
+    so no write is ever lost.
+    """
+
+    def __init__(self, session_id, db_path, max_messages=HISTORY_WINDOW):
+        self.session_id = session_id
+        self.max_messages = max_messages
+        self.pool = get_pool(db_path)
+
+    @property
+    def messages(self):
+        # LIMIT -1 means "no limit" in SQLite
+        limit = self.max_messages if self.max_messages > 0 else -1
+        with timed("history_load"), self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT message FROM messages WHERE session_id = ?"
+                " ORDER BY id DESC LIMIT ?",
+                (self.session_id, limit),
+            ).fetchall()
+        return messages_from_dict([json.loads(row[0]) for row in reversed(rows)])
+
+    def add_messages(self, messages):
+        rows = [
+            (self.session_id, json.dumps(message_to_dict(message)))
+            for message in messages
+        ]
+        with timed("history_save"), self.pool.connection() as conn:
+            conn.executemany(
+                "INSERT INTO messages (session_id, message) VALUES (?, ?)", rows
+            )
+
+    def clear(self):
+        with self.pool.connection() as conn:
+            conn.execute(
+                "DELETE FROM messages WHERE session_id = ?", (self.session_id,)
+            )
+
+    def count(self):
+        with self.pool.connection() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?",
+                (self.session_id,),
+            ).fetchone()[0]
@@ -0,0 +1,272 @@
+import os
+import json
+import shutil
+import hashlib
+
+from langchain_chroma import Chroma
+
+from agent_module.loaders import LOADER_WORKERS, list_source_files
+from agent_module.pipeline import (
+    INGEST_BATCH_SIZE,
+    INGEST_MAX_IN_FLIGHT,
+    BatchUpserter,
+    iter_file_chunks,
+    make_chunk_ids,
+)
+from agent_module.dedup import DEDUP_ENABLED, ChunkDeduper
+
+# --- CONFIGURATION ---
+MANIFEST_NAME = "index_manifest.json"
+MANIFEST_VERSION = 1
+
+
+# --- PART 1: THE MANIFEST ---
+# One JSON file next to the Chroma collection that remembers, per source file,
+# its size/mtime (cheap check), its content hash (real check) and the ids of
+# the chunks it produced. That is all we need to diff the folder on restart.
+def get_manifest_path(persist_directory):
+    return os.path.join(persist_directory, MANIFEST_NAME)
+
+
+def load_manifest(persist_directory):
+    path = get_manifest_path(persist_directory)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(persist_directory, manifest):
+    os.makedirs(persist_directory, exist_ok=True)
+    path = get_manifest_path(persist_directory)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    # Atomic swap, so a crash mid-write never leaves a half manifest behind
+    os.replace(tmp_path, path)
+
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# --- PART 2: OPEN THE STORE ---
+def open_vectorstore(persist_directory, embedding):
+    # A collection without a manifest was built by the old "nuclear" rebuild,
+    # so we cannot tell which chunks belong to which file. Start clean once.
+    if os.path.exists(persist_directory) and load_manifest(persist_directory) is None:
+        print(f"--- No index manifest found: Deleting '{persist_directory}' ---")
+        shutil.rmtree(persist_directory)
+
+    return Chroma(persist_directory=persist_directory, embedding_function=embedding)
+
+
+def index_version(vectorstore):
+    """
+    Short fingerprint of what is in the collection. Chunk ids are content hashes,
+    so the same documents always give the same version and any change gives a
+    new one. Caches stamp their entries with it.
+    """
+    ids = vectorstore._collection.get(include=[])["ids"]
+    return hashlib.sha256("\n".join(sorted(ids)).encode("utf-8")).hexdigest()[:16]
+
+
+# --- PART 3: THE INCREMENTAL SYNC ---
+def link_merged_files(deduper, indexed, old_files, new_files, vectorstore):
+    """
+    Records in the manifest which re-indexed files share merged chunks
+    ("linked") and which of their chunks carry a source list ("merged"), and
+    writes the source lists. Chunks that listed several sources before but
+    absorb nothing now lose their list.
+    """
+    rel_paths = {file_path: rel_path for file_path, rel_path, _, _ in indexed}
+    linked = {}
+    for sources in deduper.groups():
+        group = {rel_paths[source] for source in sources if source in rel_paths}
+        for rel_path in group:
+            linked.setdefault(rel_path, set()).update(group - {rel_path})
+
+    merged = deduper.merged()
+    reset_ids = []
+    for _, rel_path, _, _ in indexed:
+        entry = new_files.get(rel_path)
+        if entry is None:
+            continue  # failed to load: nothing of it is indexed
+        entry["linked"] = sorted(linked.get(rel_path, ()))
+        entry["merged"] = [i for i in entry["chunks"] if i in merged]
+        kept = set(entry["chunks"])
+        previous = old_files.get(rel_path, {}).get("merged", [])
+        reset_ids.extend(i for i in previous if i in kept and i not in merged)
+    deduper.apply_sources(vectorstore, reset_ids)
+
+
+def sync_vectorstore(
+    vectorstore,
+    data_folder,
+    persist_directory,
+    text_splitter,
+    batch_size=INGEST_BATCH_SIZE,
+    max_in_flight=INGEST_MAX_IN_FLIGHT,
+    max_workers=LOADER_WORKERS,
+    on_batch=None,
+    dedup=DEDUP_ENABLED,
+):
+    """
+    Brings the collection in line with the data folder:
+    Added/changed files stream through load -> split -> embed -> upsert, and
+    only chunks whose content hash is new get embedded.
+    Removed files have their chunks deleted.
+    Unchanged files cost one os.stat call.
+    Near-duplicate chunks among the files being indexed are dropped before
+    embedding (see dedup.py). Files whose chunks were merged are linked in the
+    manifest, and a change to one re-indexes all of them: a chunk dropped as
+    a copy of another file's comes back once that copy changes or goes away.
+    """
+    manifest = load_manifest(persist_directory) or {
+        "version": MANIFEST_VERSION,
+        "files": {},
+    }
+    old_files = manifest["files"]
+    new_files = {}
+    # A different splitter cuts different chunks: every file must be re-split
+    splitter = getattr(text_splitter, "signature", type(text_splitter).__name__)
+    resplit = bool(old_files) and manifest.get("splitter") != splitter
+    if resplit:
+        print("   > Splitter changed: re-splitting every file")
+    # Indexes deduplicated without links may be missing chunks: re-split once
+    # (chunks already in the collection keep their ids and are not re-embedded)
+    dedup_scope = "linked" if dedup else "off"
+    if old_files and not resplit and manifest.get("dedup") != dedup_scope:
+        print("   > Dedup scope changed: re-splitting every file")
+        resplit = True
+    to_index = []
+    stats = {
+        "unchanged": 0,
+        "added": 0,
+        "changed": 0,
+        "removed": 0,
+        "chunks_added": 0,
+        "chunks_deleted": 0,
+    }
+
+    # 1. Diff the folder against the manifest
+    for file_path in list_source_files(data_folder):
+        rel_path = os.path.relpath(file_path, data_folder)
+        st = os.stat(file_path)
+        entry = old_files.get(rel_path)
+
+        if (
+            entry
+            and not resplit
+            and entry["size"] == st.st_size
+            and entry["mtime_ns"] == st.st_mtime_ns
+        ):
+            new_files[rel_path] = entry
+            stats["unchanged"] += 1
+            continue
+
+        sha256 = file_sha256(file_path)
+        if entry and not resplit and entry["sha256"] == sha256:
+            # Touched but not edited: refresh the stat info, keep the chunks
+            new_files[rel_path] = dict(entry, size=st.st_size, mtime_ns=st.st_mtime_ns)
+            stats["unchanged"] += 1
+            continue
+
+        to_index.append((file_path, rel_path, st, sha256))
+
+    # Files sharing merged chunks with a changed or removed file are re-read
+    # too, so chunks dropped as duplicates are restored or merged again
+    pending = {item[1] for item in to_index}
+    removed = [r for r in old_files if r not in new_files and r not in pending]
+    queue = [item[1] for item in to_index] + removed
+    while queue:
+        for linked in old_files.get(queue.pop(), {}).get("linked", []):
+            if linked not in new_files:
+                continue
+            entry = new_files.pop(linked)
+            file_path = os.path.join(data_folder, linked)
+            to_index.append((file_path, linked, os.stat(file_path), entry["sha256"]))
+            stats["unchanged"] -= 1
+            queue.append(linked)
+    to_index.sort(key=lambda item: item[1])
+
+    # 2. Files that disappeared take their chunks with them
+    stale_ids = []
+    for rel_path in removed:
+        print(f"   - Removed: {rel_path}")
+        stale_ids.extend(old_files[rel_path]["chunks"])
+        stats["removed"] += 1
+
+    # 3. Stream what is new through the pipeline, in fixed-size batches
+    deduper = ChunkDeduper() if dedup else None
+    chunked = iter_file_chunks(
+        [item[0] for item in to_index], text_splitter, max_workers
+    )
+    with BatchUpserter(vectorstore, batch_size, max_in_flight, on_batch) as upserter:
+        for (file_path, rel_path, st, sha256), (_, chunks, error) in zip(
+            to_index, chunked
+        ):
+            entry = old_files.get(rel_path)
+            old_ids = set(entry["chunks"]) if entry else set()
+
+            if error:
+                print(f"   ! Skipping {rel_path} due to error: {error}")
+                stale_ids.extend(old_ids)
+                continue
+
+            chunk_ids = make_chunk_ids(rel_path, chunks)
+            if deduper:
+                chunks, chunk_ids = deduper.filter(chunks, chunk_ids)
+            new_chunks = []
+            new_ids = []
+            for chunk, chunk_id in zip(chunks, chunk_ids):
+                if chunk_id not in old_ids:
+                    new_chunks.append(chunk)
+                    new_ids.append(chunk_id)
+            stale_ids.extend(old_ids - set(chunk_ids))
+            upserter.add(new_chunks, new_ids)
+
+            print(
+                f"   > {'Updated' if entry else 'Indexed'}: {rel_path} "
+                f"({len(new_chunks)} new / {len(chunks)} chunks)"
+            )
+            stats["changed" if entry else "added"] += 1
+            stats["chunks_added"] += len(new_chunks)
+
+            new_files[rel_path] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "sha256": sha256,
+                "chunks": chunk_ids,
+            }
+
+    # Stale chunks go only after the new ones are in, so a crash mid-sync
+    # leaves the old manifest + old chunks (and the next run redoes the diff)
+    if stale_ids:
+        vectorstore.delete(ids=list(stale_ids))
+        stats["chunks_deleted"] = len(stale_ids)
+    if deduper:
+        link_merged_files(deduper, to_index, old_files, new_files, vectorstore)
+
+    manifest["files"] = new_files
+    manifest["splitter"] = splitter
+    manifest["dedup"] = dedup_scope
+    save_manifest(persist_directory, manifest)
+
+    stats["files"] = len(new_files)
+    print(
+        f"   > Index synced: {stats['added']} added, {stats['changed']} changed, "
+        f"{stats['removed']} removed, {stats['unchanged']} unchanged "
+        f"({stats['chunks_added']} chunks embedded)."
+    )
+    return stats
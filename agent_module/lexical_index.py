@@ -0,0 +1,152 @@
+import os
+import re
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Any
+
+from langchain_core.documents import Document
+
+from agent_module.retriever_cache import CachedRetriever
+
+# --- CONFIGURATION ---
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Constant of reciprocal-rank fusion: score = sum(1 / (RRF_K + rank))
+RRF_K = 60
+# How many candidates each side contributes to the fusion
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))
+# Queries this short whose every term is in the index go lexical-only
+LEXICAL_MAX_TERMS = int(os.getenv("LEXICAL_MAX_TERMS", "3"))
+
+TOKEN = re.compile(r"\w+")
+STOP_WORDS = frozenset(
+    "a an and are about can did do does for from have how i in is it me my of "
+    "on or tell the to was what when where which who why with you your".split()
+)
+QUOTED = re.compile(r'^\s*"(.+)"\s*$')
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+# --- PART 1: THE INVERTED INDEX ---
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring.
+    term -> {doc position: term frequency}, plus per-document lengths.
+    Exact names ("Vandan", "FastAPI") score high even when their embedding
+    is close to nothing in the collection.
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.docs = []
+        self.postings = defaultdict(dict)
+        self.doc_lengths = []
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore):
+        """Indexes every chunk already in the Chroma collection (same ids)."""
+        data = vectorstore._collection.get(include=["documents", "metadatas"])
+        index = cls()
+        index.add_documents(
+            [
+                Document(id=doc_id, page_content=text or "", metadata=metadata or {})
+                for doc_id, text, metadata in zip(
+                    data["ids"], data["documents"], data["metadatas"]
+                )
+            ]
+        )
+        return index
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add_documents(self, docs):
+        with self._lock:
+            for doc in docs:
+                position = len(self.docs)
+                terms = Counter(tokenize(doc.page_content))
+                for term, count in terms.items():
+                    self.postings[term][position] = count
+                length = sum(terms.values())
+                self.docs.append(doc)
+                self.doc_lengths.append(length)
+                self.total_length += length
+
+    def has_terms(self, terms):
+        return bool(terms) and all(term in self.postings for term in terms)
+
+    def search(self, query, k=5):
+        """Returns [(Document, score)] best first."""
+        terms = tokenize(query)
+        if not self.docs or not terms:
+            return []
+        n = len(self.docs)
+        avg_length = self.total_length / n or 1.0
+        scores = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, tf in postings.items():
+                norm = 1 - self.b + self.b * self.doc_lengths[position] / avg_length
+                scores[position] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.docs[position], score) for position, score in best]
+
+
+# --- PART 2: FUSION ---
+def doc_key(doc):
+    return doc.id or doc.page_content
+
+
+def reciprocal_rank_fusion(rankings, k, rrf_k=RRF_K):
+    """Merges several best-first document lists into one."""
+    scores = defaultdict(float)
+    docs = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = doc_key(doc)
+            scores[key] += 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in best]
+
+
+class HybridRetriever(CachedRetriever):
+    """
+    BM25 + vector search fused with reciprocal-rank fusion.
+    Short keyword queries that the lexical index fully covers (or a query in
+    "double quotes") are answered by BM25 alone, with no embedding call.
+    Results go through the same shared cache as CachedRetriever.
+    """
+
+    lexical: Any
+    fetch_k: int = HYBRID_FETCH_K
+    lexical_max_terms: int = LEXICAL_MAX_TERMS
+
+    def is_lexical(self, query):
+        quoted = QUOTED.match(query)
+        if quoted:
+            return True
+        terms = [term for term in tokenize(query) if term not in STOP_WORDS]
+        return len(terms) <= self.lexical_max_terms and self.lexical.has_terms(terms)
+
+    def _search(self, query):
+        quoted = QUOTED.match(query)
+        lexical_query = quoted.group(1) if quoted else query
+        lexical_docs = [
+            doc for doc, _ in self.lexical.search(lexical_query, k=self.fetch_k)
+        ]
+        if lexical_docs and self.is_lexical(query):
+            return lexical_docs[: self.k]
+
+        vector_docs = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        return reciprocal_rank_fusion([vector_docs, lexical_docs], self.k)
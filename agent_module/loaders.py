@@ -0,0 +1,171 @@
+import os
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from langchain_community.document_loaders import (
+    PyPDFLoader,
+    TextLoader,
+    CSVLoader,
+    Docx2txtLoader,
+)
+
+# --- CONFIGURATION ---
+# Code files are just text files!
+TEXT_EXTENSIONS = [".txt", ".py", ".sh", ".md", ".json", ".log", ".java", ".c"]
+# PDF parsing is CPU-bound, so loading fans out over a process pool
+LOADER_WORKERS = int(os.getenv("LOADER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Workers never fork the caller: the API and Streamlit hold threads and locks
+LOADER_START_METHOD = os.getenv(
+    "LOADER_START_METHOD",
+    (
+        "forkserver"
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else "spawn"
+    ),
+)
+
+
+# --- THE ROUTER (Decides which loader to use) ---
+def get_loader(file_path):
+    """Returns the LangChain loader for a file, or None if the type is unsupported."""
+    file_ext = os.path.splitext(file_path)[1].lower()
+
+    if file_ext == ".pdf":
+        return PyPDFLoader(file_path)
+    elif file_ext == ".docx":
+        return Docx2txtLoader(file_path)
+    elif file_ext == ".csv":
+        return CSVLoader(file_path)
+    elif file_ext in TEXT_EXTENSIONS:
+        return TextLoader(file_path)
+
+    # Images need an OCR engine (tesseract), which we don't ship
+    return None
+
+
+def is_supported(file_path):
+    file_ext = os.path.splitext(file_path)[1].lower()
+    return file_ext in [".pdf", ".docx", ".csv"] + TEXT_EXTENSIONS
+
+
+def load_file(file_path):
+    loader = get_loader(file_path)
+    if loader is None:
+        return []
+    return loader.load()
+
+
+def list_source_files(data_folder):
+    """Walks the data folder and returns every supported file, in a stable order."""
+    file_paths = []
+    for root, dirs, files in os.walk(data_folder):
+        dirs.sort()
+        for file in sorted(files):
+            file_path = os.path.join(root, file)
+            if is_supported(file_path):
+                file_paths.append(file_path)
+    return file_paths
+
+
+# --- PARALLEL LOADING ---
+def _load_one(file_path):
+    # Runs inside a worker process: report errors instead of raising them,
+    # so one broken file never takes the whole batch down.
+    try:
+        return file_path, load_file(file_path), None
+    except Exception as e:
+        return file_path, [], f"{type(e).__name__}: {e}"
+
+
+def _mp_context():
+    context = multiprocessing.get_context(LOADER_START_METHOD)
+    if LOADER_START_METHOD == "forkserver":
+        # Workers fork from a server that already imported this module, so
+        # each one starts without importing langchain again
+        context.set_forkserver_preload([__name__])
+    return context
+
+
+def _submit(pool, file_path):
+    try:
+        return pool.submit(_load_one, file_path)
+    except BrokenProcessPool as e:
+        # The pool already died under another file: fail this one the same way
+        future = Future()
+        future.set_exception(e)
+        return future
+
+
+def _loaded(future):
+    # Finished before the pool broke: its result is still good
+    return future.done() and future.exception() is None
+
+
+def _load_isolated(file_path, mp_context):
+    """Loads one file in a worker of its own, to find out whether it crashes."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp_context) as pool:
+        try:
+            return pool.submit(_load_one, file_path).result()
+        except Exception as e:
+            return file_path, [], f"worker crashed ({type(e).__name__})"
+
+
+def iter_load_files(file_paths, max_workers=LOADER_WORKERS):
+    """
+    Yields (file_path, docs, error) for every file, in the order given.
+    At most 2 x max_workers files are in flight, so memory stays bounded.
+    A worker that dies (e.g. a segfault in a parser) breaks the whole pool:
+    the pool is rebuilt, and only the file that crashed is reported as failed.
+    """
+    if max_workers <= 1 or len(file_paths) < 2:
+        for file_path in file_paths:
+            yield _load_one(file_path)
+        return
+
+    mp_context = _mp_context()
+    pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+    try:
+        pending = iter(file_paths)
+        window = deque(
+            (file_path, _submit(pool, file_path))
+            for file_path in itertools.islice(pending, max_workers * 2)
+        )
+        while window:
+            file_path, future = window.popleft()
+            next_path = next(pending, None)
+            if next_path is not None:
+                window.append((next_path, _submit(pool, next_path)))
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                # Any file in flight may have killed it: re-run this one alone,
+                # then restart the pool for the rest of the window
+                result = _load_isolated(file_path, mp_context)
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(
+                    max_workers=max_workers, mp_context=mp_context
+                )
+                window = deque(
+                    (path, old if _loaded(old) else _submit(pool, path))
+                    for path, old in window
+                )
+            except Exception as e:
+                result = (file_path, [], f"{type(e).__name__}: {e}")
+            yield result
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def load_files(file_paths, max_workers=LOADER_WORKERS):
+    """Loads every file and returns all Documents, in the order of file_paths."""
+    all_docs = []
+    for file_path, docs, error in iter_load_files(file_paths, max_workers):
+        if error:
+            print(f"   ! Skipping {os.path.basename(file_path)} due to error: {error}")
+            continue
+        print(f"   > Loading: {os.path.basename(file_path)}")
+        all_docs.extend(docs)
+    return all_docs
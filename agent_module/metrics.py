@@ -0,0 +1,345 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from agent_module.history_policy import SUMMARY_TAG
+from agent_module.trace_log import log_event
+
+# --- CONFIGURATION ---
+# Histogram buckets in seconds: from a cache hit to a slow multi-tool turn
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# --- PART 1: A MINIMAL PROMETHEUS REGISTRY ---
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series = {}  # labels -> [bucket counts, count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def totals(self):
+        """{labels: (count, sum)} for every series."""
+        with self._lock:
+            return {labels: (s[1], s[2]) for labels, s in self._series.items()}
+
+    def samples(self):
+        with self._lock:
+            items = sorted(
+                (labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items()
+            )
+        for labels, (counts, count, total) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = _labels(self.labelnames, labels, [("le", _number(bound))])
+                yield f"{self.name}_bucket{le} {bucket_count}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total!r}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+class GaugeFunction:
+    """A gauge read at scrape time: fn() -> {label values tuple: number}."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames, fn):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def samples(self):
+        for labels, value in sorted(self.fn().items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # Re-registering (e.g. a rebuilt brain) replaces the old one
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "rag_request_seconds", "End-to-end request latency.", ["endpoint", "status"]
+    )
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "rag_stage_seconds",
+        "Time spent per stage of a request (LLM, retrieval, tools, history).",
+        ["stage"],
+    )
+)
+INGEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "rag_ingest_stage_seconds",
+        "Time spent per ingestion stage (load, split, embed, upsert).",
+        ["stage"],
+    )
+)
+TOOL_CALLS = REGISTRY.register(
+    Counter("rag_tool_calls_total", "Agent tool calls.", ["tool", "status"])
+)
+LLM_TOKENS = REGISTRY.register(
+    Counter("rag_llm_tokens_total", "LLM tokens used.", ["type"])
+)
+
+
+# --- PART 2: TIMING ---
+_current_trace = ContextVar("request_trace", default=None)
+
+
+def observe_stage(stage, seconds):
+    """Records a stage duration globally and on the request being traced, if any."""
+    STAGE_SECONDS.observe(stage, value=seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_stage(stage, seconds)
+
+
+@contextmanager
+def timed(stage, histogram=None):
+    """Times the block as one stage (a request stage unless a histogram is given)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is None:
+            observe_stage(stage, elapsed)
+        else:
+            histogram.observe(stage, value=elapsed)
+
+
+def ingest_totals():
+    """{stage: seconds} spent so far in each ingestion stage."""
+    return {labels[0]: total for labels, (_, total) in INGEST_SECONDS.totals().items()}
+
+
+# --- PART 3: PER-REQUEST TRACE (a callback handler) ---
+def _llm_stage(response, tags):
+    if SUMMARY_TAG in tags:
+        return "history_summary"
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            # Tool-calling models fill tool_calls; the functions API (the
+            # API's create_openai_functions_agent) only sets function_call
+            if getattr(message, "tool_calls", None) or (
+                getattr(message, "additional_kwargs", None) or {}
+            ).get("function_call"):
+                return "llm_plan"
+    return "llm_answer"
+
+
+def _token_usage(response):
+    """(input, output) tokens of an LLM call, from whichever field the model filled."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if not prompt and not completion:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0)
+        completion = usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+class RequestTrace(BaseCallbackHandler):
+    """
+    Passed as a callback for one request: times every LLM call (planning,
+    final answer, history summary), retrieval and tool run under it, counts
+    tokens and tool calls, and feeds the shared histograms. History reads and
+    writes are timed through timed() and land here via the current context.
+    """
+
+    run_inline = True
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.stages = {}  # stage -> [seconds, calls]
+        self.tokens = {"input": 0, "output": 0}
+        self.tool_calls = 0
+        self._starts = {}  # run_id -> (start, tool name or tags)
+        self._lock = threading.Lock()
+
+    def add_stage(self, stage, seconds):
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    def _start(self, run_id, detail=None):
+        self._starts[run_id] = (time.perf_counter(), detail)
+
+    def _stop(self, run_id):
+        start, detail = self._starts.pop(run_id, (None, None))
+        if start is None:
+            return None, detail
+        return time.perf_counter() - start, detail
+
+    # LLM calls
+    def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, **kwargs):
+        self._start(run_id, tags or [])
+
+    def on_llm_start(self, serialized, prompts, *, run_id, tags=None, **kwargs):
+        self._start(run_id, tags or [])
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        elapsed, tags = self._stop(run_id)
+        if elapsed is not None:
+            observe_stage(_llm_stage(response, tags or []), elapsed)
+        prompt, completion = _token_usage(response)
+        LLM_TOKENS.inc("input", amount=prompt)
+        LLM_TOKENS.inc("output", amount=completion)
+        with self._lock:
+            self.tokens["input"] += prompt
+            self.tokens["output"] += completion
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._stop(run_id)
+
+    # Retrieval (inside search_my_files)
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        elapsed, _ = self._stop(run_id)
+        if elapsed is not None:
+            observe_stage("retrieval", elapsed)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._stop(run_id)
+
+    # Tools
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name", "tool")
+        self._start(run_id, name)
+
+    def _end_tool(self, run_id, status):
+        elapsed, name = self._stop(run_id)
+        name = name or "tool"
+        TOOL_CALLS.inc(name, status)
+        with self._lock:
+            self.tool_calls += 1
+        if elapsed is not None:
+            observe_stage(f"tool:{name}", elapsed)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end_tool(run_id, "error")
+
+    @contextmanager
+    def track(self):
+        """Wraps the whole request: total latency, status, and a queued summary line."""
+        token = _current_trace.set(self)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            yield self
+            status = "ok"
+        finally:
+            _current_trace.reset(token)
+            elapsed = time.perf_counter() - start
+            REQUEST_SECONDS.observe(self.endpoint, status, value=elapsed)
+            log_event(
+                "request",
+                endpoint=self.endpoint,
+                status=status,
+                seconds=round(elapsed, 3),
+                summary=self.summary(),
+            )
+
+    def summary(self):
+        with self._lock:
+            stages = ", ".join(
+                f"{stage} {seconds:.2f}s x{calls}"
+                for stage, (seconds, calls) in sorted(self.stages.items())
+            )
+            return (
+                f"{stages or 'no stages'} | tokens {self.tokens['input']} in / "
+                f"{self.tokens['output']} out | {self.tool_calls} tool calls"
+            )
@@ -0,0 +1,70 @@
+"""
+Moves FileChatMessageHistory JSON files into the SQLite history store.
+
+    python -m agent_module.migrate_history --db 03_The_Production_API/chat_history_api.sqlite \
+        03_The_Production_API/memory_api_*.json
+
+The session id is taken from the file name (memory_api_<id>.json,
+memory_agent_<id>.json, memory_<id>.json). Sessions that already have
+messages in the database are skipped, so the tool is safe to re-run.
+"""
+
+import os
+import re
+import glob
+import json
+import argparse
+
+from langchain_core.messages import messages_from_dict
+
+from agent_module.history_store import SQLiteChatMessageHistory
+
+SESSION_FILE = re.compile(r"^memory(?:1|_api|_agent)?_(?P<session_id>.+)\.json$")
+
+
+def session_id_for(file_path):
+    match = SESSION_FILE.match(os.path.basename(file_path))
+    return match.group("session_id") if match else None
+
+
+def migrate_file(file_path, db_path, remove=False):
+    session_id = session_id_for(file_path)
+    if session_id is None:
+        print(f"   ! Skipping {file_path}: not a memory_*.json file")
+        return 0
+
+    history = SQLiteChatMessageHistory(session_id, db_path, max_messages=0)
+    if history.count():
+        print(f"   - Skipping {file_path}: session '{session_id}' already migrated")
+        return 0
+
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            messages = messages_from_dict(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"   ! Skipping {file_path} due to error: {e}")
+        return 0
+
+    history.add_messages(messages)
+    print(f"   > {file_path} -> '{session_id}' ({len(messages)} messages)")
+    if remove:
+        os.remove(file_path)
+    return len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("files", nargs="+", help="JSON history files or globs")
+    parser.add_argument("--db", required=True, help="Target SQLite database")
+    parser.add_argument(
+        "--remove", action="store_true", help="Delete each JSON file once migrated"
+    )
+    args = parser.parse_args()
+
+    file_paths = sorted({path for pattern in args.files for path in glob.glob(pattern)})
+    total = sum(migrate_file(path, args.db, args.remove) for path in file_paths)
+    print(f"--- Migrated {total} messages from {len(file_paths)} files ---")
+
+
+if __name__ == "__main__":
+    main()
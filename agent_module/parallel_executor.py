@@ -0,0 +1,57 @@
+import os
+from contextvars import ContextVar
+from functools import partial
+
+from langchain_classic.agents.agent import AgentExecutor
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+# --- CONFIGURATION ---
+# Most tool calls the agent can run at once from a single step
+PARALLEL_TOOL_WORKERS = int(os.getenv("PARALLEL_TOOL_WORKERS", "4"))
+
+# Set while a step is being planned: tool calls are collected, not run
+_deferred = ContextVar("deferred_tool_calls", default=False)
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor that runs the tool calls of one step concurrently.
+    A tool-calling model often asks for search_my_files and duckduckgo_search
+    (or several searches) in one turn; the stock sync loop runs them one by
+    one. Here they go to a thread pool (which keeps the callback context),
+    and the observations come back in the order the model asked for them,
+    so intermediate_steps look exactly like a sequential run.
+    The async path (ainvoke) already gathers tool calls and is unchanged.
+    """
+
+    max_parallel_tools: int = PARALLEL_TOOL_WORKERS
+
+    def _perform_agent_action(
+        self, name_to_tool_map, color_mapping, agent_action, run_manager=None
+    ):
+        call = partial(
+            super()._perform_agent_action,
+            name_to_tool_map,
+            color_mapping,
+            agent_action,
+            run_manager,
+        )
+        return call if _deferred.get() else call()
+
+    def _iter_next_step(self, *args, **kwargs):
+        token = _deferred.set(True)
+        try:
+            items = list(super()._iter_next_step(*args, **kwargs))
+        finally:
+            _deferred.reset(token)
+
+        calls = [item for item in items if isinstance(item, partial)]
+        if len(calls) > 1 and self.max_parallel_tools > 1:
+            workers = min(len(calls), self.max_parallel_tools)
+            with ContextThreadPoolExecutor(max_workers=workers) as pool:
+                steps = iter(list(pool.map(lambda call: call(), calls)))
+        else:
+            steps = (call() for call in calls)
+
+        for item in items:
+            yield next(steps) if isinstance(item, partial) else item
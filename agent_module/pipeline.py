@@ -0,0 +1,183 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_module.loaders import LOADER_WORKERS, iter_load_files
+from agent_module.dedup import DEDUP_ENABLED, ChunkDeduper
+from agent_module.metrics import INGEST_SECONDS, timed
+
+# --- CONFIGURATION ---
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+# How many batches may be embedding/upserting while the next one is prepared
+INGEST_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "2"))
+
+
+def make_chunk_ids(rel_path, chunks):
+    """Content-hash ids, so an unchanged chunk keeps its id (and its embedding)."""
+    ids = []
+    seen = {}
+    for chunk in chunks:
+        chunk_hash = hashlib.sha256(
+            f"{rel_path}\0{chunk.page_content}".encode("utf-8")
+        ).hexdigest()
+        # The same text twice in one file still needs two distinct ids
+        count = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = count + 1
+        ids.append(chunk_hash if count == 0 else f"{chunk_hash}-{count}")
+    return ids
+
+
+# --- STAGE 1 + 2: LOAD -> SPLIT (one file at a time) ---
+def iter_file_chunks(file_paths, text_splitter, max_workers=LOADER_WORKERS):
+    """Yields (file_path, chunks, error) per file, in order, without holding the corpus."""
+    loaded = iter_load_files(file_paths, max_workers)
+    while True:
+        # Loading runs ahead in a pool: this is the time spent waiting on it
+        with timed("load", INGEST_SECONDS):
+            item = next(loaded, None)
+        if item is None:
+            return
+        file_path, docs, error = item
+        if error:
+            yield file_path, [], error
+            continue
+        with timed("split", INGEST_SECONDS):
+            chunks = text_splitter.split_documents(docs)
+        yield file_path, chunks, None
+
+
+# --- STAGE 3 + 4: EMBED -> UPSERT (fixed-size batches) ---
+def upsert_embedded(vectorstore, ids, chunks, vectors):
+    # Chroma.add_documents would embed again, so talk to the collection directly
+    vectorstore._collection.upsert(
+        ids=ids,
+        embeddings=vectors,
+        documents=[chunk.page_content for chunk in chunks],
+        metadatas=[chunk.metadata or None for chunk in chunks],
+    )
+
+
+class BatchUpserter:
+    """
+    Buffers chunks into fixed-size batches and embeds + upserts each batch on a
+    small thread pool. add() blocks once max_in_flight batches are pending, so
+    memory stays flat no matter how big the corpus is, and every finished batch
+    is immediately searchable.
+    """
+
+    def __init__(
+        self,
+        vectorstore,
+        batch_size=INGEST_BATCH_SIZE,
+        max_in_flight=INGEST_MAX_IN_FLIGHT,
+        on_batch=None,
+    ):
+        self.vectorstore = vectorstore
+        self.embedding = vectorstore.embeddings
+        self.batch_size = batch_size
+        self.on_batch = on_batch
+        self.chunks_done = 0
+        self.batches_done = 0
+
+        self._chunks = []
+        self._ids = []
+        self._error = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="ingest"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            return False
+        self.close()
+        return False
+
+    def add(self, chunks, ids):
+        self._chunks.extend(chunks)
+        self._ids.extend(ids)
+        while len(self._chunks) >= self.batch_size:
+            self._submit(self._chunks[: self.batch_size], self._ids[: self.batch_size])
+            del self._chunks[: self.batch_size]
+            del self._ids[: self.batch_size]
+
+    def close(self):
+        if self._chunks:
+            self._submit(self._chunks, self._ids)
+            self._chunks, self._ids = [], []
+        self._pool.shutdown(wait=True)
+        self._raise_if_failed()
+
+    def _submit(self, chunks, ids):
+        # Back-pressure: wait for a free slot before building another batch
+        self._slots.acquire()
+        try:
+            self._raise_if_failed()
+            future = self._pool.submit(self._embed_and_upsert, chunks, ids)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def _embed_and_upsert(self, chunks, ids):
+        try:
+            with timed("embed", INGEST_SECONDS):
+                vectors = self.embedding.embed_documents(
+                    [chunk.page_content for chunk in chunks]
+                )
+            with timed("upsert", INGEST_SECONDS):
+                upsert_embedded(self.vectorstore, ids, chunks, vectors)
+        except Exception as e:
+            with self._lock:
+                self._error = self._error or e
+            return
+
+        with self._lock:
+            self.chunks_done += len(chunks)
+            self.batches_done += 1
+            if self.on_batch:
+                self.on_batch(self.batches_done, self.chunks_done)
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError(f"Ingestion failed: {self._error}") from self._error
+
+
+# --- THE FULL PIPELINE (fresh collection) ---
+def ingest_documents(
+    vectorstore,
+    data_folder,
+    file_paths,
+    text_splitter,
+    batch_size=INGEST_BATCH_SIZE,
+    max_in_flight=INGEST_MAX_IN_FLIGHT,
+    max_workers=LOADER_WORKERS,
+    on_batch=None,
+    dedup=DEDUP_ENABLED,
+):
+    """Streams load -> split -> dedup -> embed -> upsert over file_paths. Returns the chunk count."""
+    deduper = ChunkDeduper() if dedup else None
+    with BatchUpserter(vectorstore, batch_size, max_in_flight, on_batch) as upserter:
+        for file_path, chunks, error in iter_file_chunks(
+            file_paths, text_splitter, max_workers
+        ):
+            if error:
+                print(
+                    f"   ! Skipping {os.path.basename(file_path)} due to error: {error}"
+                )
+                continue
+            print(f"   > Loading: {os.path.basename(file_path)} ({len(chunks)} chunks)")
+            rel_path = os.path.relpath(file_path, data_folder)
+            chunk_ids = make_chunk_ids(rel_path, chunks)
+            if deduper:
+                chunks, chunk_ids = deduper.filter(chunks, chunk_ids)
+            upserter.add(chunks, chunk_ids)
+    if deduper:
+        deduper.apply_sources(vectorstore)
+    return upserter.chunks_done
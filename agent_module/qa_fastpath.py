@@ -0,0 +1,218 @@
+import os
+import re
+import time
+import asyncio
+import threading
+
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+
+from agent_module.embeddings import _model_name, normalize_text
+from agent_module.lexical_index import tokenize
+from agent_module.trace_log import log_event
+
+# --- CONFIGURATION ---
+QA_FILE_NAME = "hr_qa_knowledge_base.txt"
+# Token overlap (Jaccard of the word sets) needed to answer without the agent
+QA_FASTPATH_LEXICAL_THRESHOLD = float(os.getenv("QA_FASTPATH_LEXICAL_THRESHOLD", "0.9"))
+# Embedding cosine needed to answer without the agent. Scales differ by model
+# (ada-002 puts loosely related questions at 0.75-0.95), so unless set here
+# the default comes from COSINE_THRESHOLDS for the model in use
+QA_FASTPATH_COSINE_THRESHOLD = os.getenv("QA_FASTPATH_COSINE_THRESHOLD")
+COSINE_THRESHOLDS = {
+    "text-embedding-ada-002": 0.97,
+    "text-embedding-3-small": 0.85,
+    "text-embedding-3-large": 0.85,
+}
+# Unknown model: only near-identical wording goes past the agent
+DEFAULT_COSINE_THRESHOLD = 0.97
+
+QUESTION = re.compile(r"^Q:\s*(.+)$")
+ANSWER = re.compile(r"^A:\s*(.*)$")
+# A blank "---" rule or a "# HEADING" closes the current answer
+SECTION_END = re.compile(r"^(---+|#.*)$")
+
+
+def parse_qa_pairs(text):
+    """Returns [(question, answer)] from the curated Q:/A: file."""
+    pairs = []
+    question, answer = None, None
+
+    def flush():
+        if question and answer:
+            body = "\n".join(answer).strip()
+            if body:
+                pairs.append((question, body))
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        match = QUESTION.match(stripped)
+        if match:
+            flush()
+            question, answer = match.group(1).strip(), None
+            continue
+        match = ANSWER.match(stripped)
+        if match and question and answer is None:
+            answer = [match.group(1)] if match.group(1) else []
+            continue
+        if SECTION_END.match(stripped):
+            flush()
+            question, answer = None, None
+            continue
+        if answer is not None:
+            answer.append(line)
+    flush()
+    return pairs
+
+
+def default_cosine_threshold(embedding):
+    """QA_FASTPATH_COSINE_THRESHOLD if set, else the default for the embedding model."""
+    if QA_FASTPATH_COSINE_THRESHOLD:
+        return float(QA_FASTPATH_COSINE_THRESHOLD)
+    name = getattr(embedding, "model_name", None) or _model_name(embedding)
+    return COSINE_THRESHOLDS.get(name.split(":")[0], DEFAULT_COSINE_THRESHOLD)
+
+
+def token_overlap(a, b):
+    """Jaccard overlap of the two token sets (1.0 = same words)."""
+    a, b = set(tokenize(a)), set(tokenize(b))
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class QAFastPath:
+    """
+    Curated answers without an LLM call.
+    Incoming questions are matched against the Q: lines of the Q&A file,
+    first by token overlap and, if that is not conclusive, by embedding cosine.
+    Each score has its own threshold (they are on different scales); a match
+    at or above it returns the curated A: text directly, anything else goes
+    to the agent. Latency is counted per path.
+    """
+
+    def __init__(
+        self,
+        pairs,
+        embedding=None,
+        lexical_threshold=QA_FASTPATH_LEXICAL_THRESHOLD,
+        cosine_threshold=None,
+    ):
+        self.pairs = pairs
+        self.embedding = embedding
+        self.lexical_threshold = lexical_threshold
+        if cosine_threshold is None and embedding is not None:
+            cosine_threshold = default_cosine_threshold(embedding)
+        self.cosine_threshold = cosine_threshold
+        self._questions = [normalize_text(question).lower() for question, _ in pairs]
+        self._vectors = None  # embedded lazily, on the first non-exact query
+        self._lock = threading.Lock()
+        self.counters = {
+            "fastpath": {"requests": 0, "seconds": 0.0},
+            "agent": {"requests": 0, "seconds": 0.0},
+        }
+
+    @classmethod
+    def from_folder(
+        cls,
+        data_folder,
+        embedding=None,
+        lexical_threshold=QA_FASTPATH_LEXICAL_THRESHOLD,
+        cosine_threshold=None,
+    ):
+        path = os.path.join(data_folder, QA_FILE_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                pairs = parse_qa_pairs(f.read())
+        except OSError as e:
+            print(f"   ! Q&A fast path disabled: {e}")
+            pairs = []
+        print(f"   > Q&A fast path: {len(pairs)} curated answers")
+        return cls(pairs, embedding, lexical_threshold, cosine_threshold)
+
+    # --- PART 1: MATCHING ---
+    def _question_vectors(self):
+        with self._lock:
+            if self._vectors is None:
+                questions = [normalize_text(question) for question, _ in self.pairs]
+                vectors = np.asarray(
+                    self.embedding.embed_documents(questions), dtype=np.float32
+                )
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                self._vectors = vectors / np.where(norms == 0, 1, norms)
+            return self._vectors
+
+    def match(self, query):
+        """Returns (answer or None, confidence)."""
+        if not self.pairs:
+            return None, 0.0
+        # Embedded as normalized (not lowered), the exact text AnswerCache embeds
+        # next, so a miss here costs one embedding call per turn, not two
+        query = normalize_text(query)
+        scores = [token_overlap(query.lower(), q) for q in self._questions]
+        best = int(np.argmax(scores))
+        confidence = scores[best]
+
+        if confidence >= self.lexical_threshold:
+            return self.pairs[best][1], confidence
+        if self.embedding is None:
+            return None, confidence
+
+        vector = np.asarray(self.embedding.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        cosines = self._question_vectors() @ (vector / norm if norm else vector)
+        best = int(np.argmax(cosines))
+        confidence = float(cosines[best])
+        if confidence >= self.cosine_threshold:
+            return self.pairs[best][1], confidence
+        return None, confidence
+
+    # --- PART 2: THE RUNNABLE WRAPPER ---
+    def _count(self, path, elapsed):
+        with self._lock:
+            self.counters[path]["requests"] += 1
+            self.counters[path]["seconds"] += elapsed
+
+    def wrap(self, runnable, input_key="input"):
+        """Returns runnable behind the fast path; output keeps the {"output": ...} shape."""
+
+        def answered(inputs, answer, confidence, start):
+            self._count("fastpath", time.perf_counter() - start)
+            log_event("qa_fastpath_hit", confidence=round(confidence, 3))
+            return {**inputs, "output": answer, "fastpath": True}
+
+        def invoke(inputs, config):
+            start = time.perf_counter()
+            answer, confidence = self.match(inputs[input_key])
+            if answer is not None:
+                return answered(inputs, answer, confidence, start)
+            result = runnable.invoke(inputs, config)
+            self._count("agent", time.perf_counter() - start)
+            return result
+
+        async def ainvoke(inputs, config):
+            start = time.perf_counter()
+            # match() may embed the query (blocking HTTP): keep it off the loop
+            loop = asyncio.get_running_loop()
+            answer, confidence = await loop.run_in_executor(
+                None, self.match, inputs[input_key]
+            )
+            if answer is not None:
+                return answered(inputs, answer, confidence, start)
+            result = await runnable.ainvoke(inputs, config)
+            self._count("agent", time.perf_counter() - start)
+            return result
+
+        return RunnableLambda(invoke, afunc=ainvoke, name="QAFastPath")
+
+    def stats(self):
+        stats = {}
+        for path, counter in self.counters.items():
+            requests = counter["requests"]
+            stats[path] = {
+                "requests": requests,
+                "avg_ms": (
+                    round(counter["seconds"] / requests * 1000, 2) if requests else 0.0
+                ),
+            }
+        return stats
@@ -0,0 +1,90 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langchain_core.retrievers import BaseRetriever
+
+from agent_module.embeddings import normalize_text
+
+# --- CONFIGURATION ---
+RETRIEVER_CACHE_SIZE = int(os.getenv("RETRIEVER_CACHE_SIZE", "512"))
+
+
+class RetrieverCache:
+    """Thread-safe LRU of search results, keyed by (index version, query, k)."""
+
+    def __init__(self, max_entries=RETRIEVER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            docs = self._results.get(key)
+            if docs is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._results.move_to_end(key)
+            return docs
+
+    def put(self, key, docs):
+        with self._lock:
+            self._results[key] = docs
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._results),
+        }
+
+
+# One cache for every retriever in the process, so all sessions share hits.
+# Entries of an old index version simply age out of the LRU.
+shared_cache = RetrieverCache()
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    Similarity search with a result cache in front of it.
+    The same (or only differently cased/spaced) query with the same k is
+    answered from the cache instead of a new embed + search round trip.
+    """
+
+    vectorstore: Any
+    k: int = 5
+    index_version: str = ""
+    cache: Optional[Any] = None
+
+    def _cache(self):
+        return self.cache if self.cache is not None else shared_cache
+
+    def _search(self, query):
+        return self.vectorstore.similarity_search(query, k=self.k)
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        key = (
+            type(self).__name__,
+            self.index_version,
+            normalize_text(query).lower(),
+            self.k,
+        )
+        docs = self._cache().get(key)
+        if docs is None:
+            docs = self._search(query)
+            self._cache().put(key, docs)
+        # A new list, so callers can never reorder the cached one
+        return list(docs)
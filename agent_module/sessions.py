@@ -0,0 +1,51 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# --- CONFIGURATION ---
+# Sessions untouched for this long drop their cached history handle
+SESSION_IDLE_SECONDS = int(os.getenv("SESSION_IDLE_SECONDS", "1800"))
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+
+
+class SessionHistoryCache:
+    """
+    A get_session_history drop-in for RunnableWithMessageHistory.
+    The history object for a session is built once and reused on every turn,
+    instead of being re-created per request. Handles idle for longer than
+    idle_seconds (or beyond max_sessions, least recent first) are evicted.
+    """
+
+    def __init__(
+        self,
+        factory,
+        idle_seconds=SESSION_IDLE_SECONDS,
+        max_sessions=SESSION_CACHE_SIZE,
+    ):
+        self.factory = factory
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._handles = OrderedDict()  # session_id -> (history, last_used)
+        self._lock = threading.Lock()
+
+    def __call__(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            item = self._handles.pop(session_id, None)
+            history = item[0] if item else self.factory(session_id)
+            # Re-inserting keeps the dict ordered from least to most recent
+            self._handles[session_id] = (history, now)
+            self._evict(now)
+        return history
+
+    def __len__(self):
+        return len(self._handles)
+
+    def _evict(self, now):
+        while self._handles:
+            _, (_, last_used) = next(iter(self._handles.items()))
+            too_many = len(self._handles) > self.max_sessions
+            if not too_many and now - last_used < self.idle_seconds:
+                break
+            self._handles.popitem(last=False)
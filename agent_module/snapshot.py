@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+
+import numpy as np
+
+from agent_module.dedup import DEDUP_ENABLED, DEDUP_THRESHOLD
+from agent_module.embeddings import ROOT_DIR, _model_name
+from agent_module.indexing import file_sha256
+
+# --- CONFIGURATION ---
+INDEX_SNAPSHOT_DIR = os.getenv(
+    "INDEX_SNAPSHOT_DIR", os.path.join(ROOT_DIR, ".cache", "index_snapshot")
+)
+INDEX_SNAPSHOT_ENABLED = os.getenv("INDEX_SNAPSHOT_ENABLED", "1") != "0"
+# Bump when the on-disk layout changes: older snapshots are then rebuilt
+SNAPSHOT_VERSION = 1
+# Rows per Chroma write when restoring
+RESTORE_BATCH_SIZE = 1000
+
+MANIFEST_FILE = "manifest.json"
+CHUNKS_FILE = "chunks.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+
+
+# --- PART 1: WHAT THE INDEX WAS BUILT FROM ---
+def source_fingerprint(data_folder, file_paths, text_splitter, embedding):
+    """
+    sha256 over everything that shapes the index: each file's path and content,
+    the splitter signature, the embedding model and the dedup settings.
+    Hashing a few MB of source is far cheaper than embedding it again.
+    """
+    digest = hashlib.sha256()
+    splitter = getattr(text_splitter, "signature", type(text_splitter).__name__)
+    model = getattr(embedding, "model_name", None) or _model_name(embedding)
+    digest.update(
+        f"v{SNAPSHOT_VERSION}\0{splitter}\0{model}\0"
+        f"{DEDUP_ENABLED}:{DEDUP_THRESHOLD}\0".encode("utf-8")
+    )
+    for file_path in sorted(file_paths):
+        rel_path = os.path.relpath(file_path, data_folder)
+        digest.update(f"{rel_path}\0{file_sha256(file_path)}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# --- PART 2: SAVE ---
+def save_snapshot(vectorstore, fingerprint, snapshot_dir=INDEX_SNAPSHOT_DIR):
+    """
+    Writes the collection (ids, texts, metadata, embedding matrix) to
+    snapshot_dir/<fingerprint>/. It is written next to the target and renamed
+    into place, so a crash never leaves a half snapshot; older ones are removed.
+    """
+    data = vectorstore._collection.get(include=["documents", "metadatas", "embeddings"])
+    if not data["ids"]:
+        return None
+
+    target = os.path.join(snapshot_dir, fingerprint)
+    tmp = f"{target}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    matrix = np.asarray(data["embeddings"], dtype=np.float32)
+    np.save(os.path.join(tmp, EMBEDDINGS_FILE), matrix)
+    with open(os.path.join(tmp, CHUNKS_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "ids": data["ids"],
+                "documents": data["documents"],
+                "metadatas": data["metadatas"],
+            },
+            f,
+            ensure_ascii=False,
+        )
+    # The manifest goes last: a snapshot without one is never loaded
+    with open(os.path.join(tmp, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": SNAPSHOT_VERSION,
+                "fingerprint": fingerprint,
+                "chunks": len(data["ids"]),
+                "dimensions": int(matrix.shape[1]),
+                "created_at": time.time(),
+            },
+            f,
+            indent=2,
+        )
+
+    shutil.rmtree(target, ignore_errors=True)
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Another process saved the same fingerprint between rmtree and replace
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(target, MANIFEST_FILE)):
+            raise
+    prune_snapshots(snapshot_dir, keep=fingerprint)
+    print(f"   > Index snapshot saved: {len(data['ids'])} chunks -> {target}")
+    return target
+
+
+def prune_snapshots(snapshot_dir, keep):
+    """
+    Deletes complete snapshots other than keep. Directories without a manifest
+    (e.g. another process's <fp>.tmp-<pid> still being written) are left alone.
+    """
+    for name in os.listdir(snapshot_dir):
+        path = os.path.join(snapshot_dir, name)
+        if name == keep or ".tmp-" in name:
+            continue
+        if os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# --- PART 3: LOAD ---
+def load_snapshot(vectorstore, fingerprint, snapshot_dir=INDEX_SNAPSHOT_DIR):
+    """
+    Fills the (empty, in-memory) collection from the snapshot for fingerprint.
+    Returns the chunk count, or 0 when there is no valid snapshot for it.
+    The embedding matrix is memory-mapped, so nothing is re-split or re-embedded.
+    """
+    target = os.path.join(snapshot_dir, fingerprint)
+    try:
+        with open(os.path.join(target, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (
+            manifest.get("version") != SNAPSHOT_VERSION
+            or manifest.get("fingerprint") != fingerprint
+        ):
+            return 0
+        matrix = np.load(os.path.join(target, EMBEDDINGS_FILE), mmap_mode="r")
+        with open(os.path.join(target, CHUNKS_FILE), "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+    except (OSError, ValueError) as e:
+        if os.path.exists(target):
+            print(f"   ! Ignoring unreadable index snapshot: {e}")
+        return 0
+
+    ids = chunks["ids"]
+    if len(ids) != manifest["chunks"] or matrix.shape[0] != len(ids):
+        print("   ! Ignoring index snapshot: chunk count does not match")
+        return 0
+
+    for start in range(0, len(ids), RESTORE_BATCH_SIZE):
+        end = start + RESTORE_BATCH_SIZE
+        vectorstore._collection.upsert(
+            ids=ids[start:end],
+            embeddings=np.asarray(matrix[start:end]),
+            documents=chunks["documents"][start:end],
+            metadatas=chunks["metadatas"][start:end],
+        )
+    return len(ids)
@@ -0,0 +1,38 @@
+from functools import lru_cache
+
+import tiktoken
+
+# --- CONFIGURATION ---
+DEFAULT_ENCODING = "cl100k_base"
+
+
+class ApproxEncoding:
+    """
+    Stand-in used when tiktoken cannot fetch its BPE files (offline boxes, CI).
+    Roughly 4 characters per token for English text, which is close enough
+    for budgeting.
+    """
+
+    name = "approx"
+
+    def encode(self, text, **kwargs):
+        return list(range((len(text) + 3) // 4))
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model=None):
+    """tiktoken encoding for a model name, falling back to cl100k_base."""
+    try:
+        if model:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        print(f"   ! tiktoken unavailable ({type(e).__name__}), estimating tokens")
+        return ApproxEncoding()
+
+
+def count_tokens(text, model=None):
+    return len(get_encoding(model).encode(text, disallowed_special=()))
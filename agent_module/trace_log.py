@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# --- CONFIGURATION ---
+# JSON lines go here (empty = stdout); written by a background thread
+TRACE_LOG_FILE = os.getenv("TRACE_LOG_FILE", "")
+# Share of turns logged with their full steps; the rest get a one-line summary
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+# Observations and answers are cut to this many characters
+TRACE_MAX_CHARS = int(os.getenv("TRACE_MAX_CHARS", "500"))
+# AgentExecutor's own (synchronous) console output, off unless debugging
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "0") == "1"
+
+logger = logging.getLogger("agent_module.trace")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+# --- PART 1: THE SINK (queue in the request thread, I/O in the background) ---
+class JSONLineFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": round(record.created, 3)}
+        entry.update(
+            record.msg if isinstance(record.msg, dict) else {"msg": record.getMessage()}
+        )
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DictQueueHandler(QueueHandler):
+    """Queues records as they are: the dict payload is formatted by the listener."""
+
+    def prepare(self, record):
+        return record
+
+
+def _start_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        if TRACE_LOG_FILE:
+            target = logging.FileHandler(TRACE_LOG_FILE, encoding="utf-8")
+        else:
+            target = logging.StreamHandler(sys.stdout)
+        target.setFormatter(JSONLineFormatter())
+        records = queue.SimpleQueue()
+        logger.addHandler(DictQueueHandler(records))
+        _listener = QueueListener(records, target)
+        _listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(_listener.stop)
+
+
+def truncate(text, limit=TRACE_MAX_CHARS):
+    text = text if isinstance(text, str) else str(text)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more chars]"
+
+
+def log_event(event, **fields):
+    """Queues one JSON line for a request-path event (cache hit, timing, ...)."""
+    _start_listener()
+    logger.info({"event": event, **fields})
+
+
+# --- PART 2: AGENT TURNS ---
+def log_agent_steps(response, session_id=None, sample_rate=None):
+    """
+    Logs one agent turn as a JSON line without blocking on I/O.
+    Every turn gets the tools it called and their inputs; a sampled share
+    (sample_rate, default TRACE_SAMPLE_RATE) also gets every observation,
+    truncated to TRACE_MAX_CHARS.
+    """
+    _start_listener()
+    sample_rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    steps = response.get("intermediate_steps", [])
+    sampled = random.random() < sample_rate
+
+    entry = {
+        "event": "agent_turn",
+        "session_id": session_id,
+        "input": truncate(response.get("input", "")),
+        "tools": [
+            {"tool": action.tool, "input": action.tool_input} for action, _ in steps
+        ],
+        "answer_chars": len(response.get("output", "")),
+        "cached": bool(response.get("cached")),
+        "fastpath": bool(response.get("fastpath")),
+        "sampled": sampled,
+    }
+    if sampled:
+        entry["steps"] = [
+            {
+                "tool": action.tool,
+                "input": action.tool_input,
+                "observation": truncate(observation),
+                "observation_chars": len(str(observation)),
+            }
+            for action, observation in steps
+        ]
+        entry["answer"] = truncate(response.get("output", ""))
+    logger.info(entry)
@@ -0,0 +1,185 @@
+import os
+import time
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Optional, Type
+
+from pydantic import BaseModel, Field
+from langchain_core.tools import BaseTool
+
+from agent_module.embeddings import normalize_text
+
+# --- CONFIGURATION ---
+# Hard deadline per search; the agent gets an "unavailable" observation after it
+WEB_SEARCH_TIMEOUT_SECONDS = float(os.getenv("WEB_SEARCH_TIMEOUT_SECONDS", "6"))
+WEB_SEARCH_CACHE_TTL_SECONDS = int(os.getenv("WEB_SEARCH_CACHE_TTL_SECONDS", "3600"))
+WEB_SEARCH_CACHE_SIZE = int(os.getenv("WEB_SEARCH_CACHE_SIZE", "256"))
+# Searches running at once, across every request in the process
+WEB_SEARCH_CONCURRENCY = int(os.getenv("WEB_SEARCH_CONCURRENCY", "4"))
+
+UNAVAILABLE = (
+    "Web search is unavailable right now ({reason}). "
+    "Answer from the other tools or say you are not sure."
+)
+
+
+# --- PART 1: CACHE + LIMITS (shared by every tool instance) ---
+class SearchCache:
+    """Thread-safe LRU of search results with a TTL, keyed by normalized query."""
+
+    def __init__(
+        self,
+        ttl_seconds=WEB_SEARCH_CACHE_TTL_SECONDS,
+        max_entries=WEB_SEARCH_CACHE_SIZE,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()  # query -> (result, stored_at)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query):
+        return normalize_text(query).lower()
+
+    def get(self, query):
+        key = self.key(query)
+        with self._lock:
+            item = self._results.get(key)
+            if item is None or time.monotonic() - item[1] > self.ttl_seconds:
+                self._results.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._results.move_to_end(key)
+            return item[0]
+
+    def put(self, query, result):
+        key = self.key(query)
+        with self._lock:
+            self._results[key] = (result, time.monotonic())
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._results),
+        }
+
+
+shared_cache = SearchCache()
+_slots = threading.BoundedSemaphore(WEB_SEARCH_CONCURRENCY)
+# Twice the slots: a search that blew its deadline may still hold a thread
+_pool = ThreadPoolExecutor(
+    max_workers=WEB_SEARCH_CONCURRENCY * 2, thread_name_prefix="web-search"
+)
+# Searches in flight by cache key, so concurrent identical queries share one
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def duckduckgo_backend():
+    from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+
+    return DuckDuckGoSearchAPIWrapper().run
+
+
+# --- PART 2: THE TOOL ---
+class WebSearchInput(BaseModel):
+    query: str = Field(description="search query to look up")
+
+
+class CachedWebSearch(BaseTool):
+    """
+    Web search with a result cache, a hard deadline and a process-wide
+    concurrency limit. backend is any callable query -> text (DuckDuckGo by
+    default), so it can be pointed at a local fake in benchmarks.
+    A search that misses its deadline keeps running in the background and
+    still fills the cache, so asking again a moment later is instant.
+    """
+
+    name: str = "duckduckgo_search"
+    description: str = (
+        "A wrapper around DuckDuckGo Search. "
+        "Useful for when you need to answer questions about current events. "
+        "Input should be a search query."
+    )
+    args_schema: Type[BaseModel] = WebSearchInput
+    backend: Optional[Any] = None
+    timeout: float = WEB_SEARCH_TIMEOUT_SECONDS
+    cache: Optional[Any] = None
+
+    def _cache(self):
+        return self.cache if self.cache is not None else shared_cache
+
+    def _search(self, query):
+        try:
+            result = (self.backend or duckduckgo_backend())(query)
+            # Cached before it leaves _inflight, so no caller sees neither
+            self._cache().put(query, result)
+            return result
+        finally:
+            _slots.release()
+            with _inflight_lock:
+                _inflight.pop(SearchCache.key(query), None)
+
+    def _start(self, query):
+        """Returns the future of the search for query, joining one in flight."""
+        key = SearchCache.key(query)
+        with _inflight_lock:
+            future = _inflight.get(key)
+        if future is not None:
+            return future
+        if not _slots.acquire(timeout=self.timeout):
+            return None
+        # Check and register in one hold: while we waited for a slot, the same
+        # search may have started, or finished and filled the cache
+        with _inflight_lock:
+            future = _inflight.get(key)
+            cached = None if future is not None else self._cache().get(query)
+            if future is None and cached is None:
+                try:
+                    future = _pool.submit(self._search, query)
+                except BaseException:
+                    _slots.release()
+                    raise
+                _inflight[key] = future
+                return future
+        _slots.release()
+        if future is None:
+            future = Future()
+            future.set_result(cached)
+        return future
+
+    def _run(self, query, run_manager=None):
+        cached = self._cache().get(query)
+        if cached is not None:
+            return cached
+
+        deadline = time.monotonic() + self.timeout
+        future = self._start(query)
+        if future is None:
+            print(f"   ! Web search busy, skipped: '{query[:60]}'")
+            return UNAVAILABLE.format(reason="too many searches in flight")
+
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            print(f"   ! Web search timed out after {self.timeout}s: '{query[:60]}'")
+            return UNAVAILABLE.format(reason=f"no reply within {self.timeout:g}s")
+        except Exception as e:
+            print(f"   ! Web search failed: {e}")
+            return UNAVAILABLE.format(reason=type(e).__name__)
+
+
+def get_web_search_tool(backend=None):
+    return CachedWebSearch(backend=backend)
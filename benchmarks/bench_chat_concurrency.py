@@ -0,0 +1,92 @@
+"""
+/chat throughput vs in-flight requests on a single worker.
+
+The agent is replaced by a stand-in that "thinks" for --latency seconds, so
+the numbers isolate the request path. If /chat blocks the event loop,
+throughput stays flat as concurrency grows; if it is truly async it scales.
+
+    python -m benchmarks.bench_chat_concurrency --requests 64 --concurrency 1 4 16 64
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+import httpx
+from langchain_core.runnables import RunnableLambda
+
+API_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "03_The_Production_API")
+)
+sys.path.append(API_DIR)
+os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+
+def make_fake_agent(latency):
+    def think(inputs):
+        time.sleep(latency)
+        return {"output": f"echo: {inputs['input']}"}
+
+    async def athink(inputs):
+        await asyncio.sleep(latency)
+        return {"output": f"echo: {inputs['input']}"}
+
+    return RunnableLambda(think, afunc=athink)
+
+
+async def run(app, total, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def one(i):
+            async with limit:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/chat", json={"query": f"question {i}", "session_id": f"s{i % 8}"}
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "in_flight": concurrency,
+        "seconds": round(elapsed, 2),
+        "req_per_s": round(total / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    import server
+
+    server.agent_executor = make_fake_agent(args.latency)
+    server.agent_with_memory = server.create_agent_with_memory(server.agent_executor)
+    server.build_state["status"] = "ready"
+
+    # The session history database lands in a scratch folder, not in the repo
+    os.chdir(tempfile.mkdtemp(prefix="bench_chat_"))
+    print(f"--- {args.requests} requests, {args.latency}s simulated LLM latency ---")
+    for concurrency in args.concurrency:
+        print(asyncio.run(run(server.app, args.requests, concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Ingestion wall time vs embedding concurrency, against the fake embedding server.
+
+The server throttles (429 + Retry-After) above --server-limit concurrent
+requests and at --error-rate, so the retry/backoff path is exercised too.
+
+    python -m benchmarks.bench_embedding_scheduler --chunks 2000 --concurrency 1 2 4 8
+"""
+
+import time
+import random
+import argparse
+
+from langchain_openai import OpenAIEmbeddings
+
+from agent_module.embedding_scheduler import ScheduledEmbeddings
+from benchmarks.fake_embedding_server import FakeEmbeddingServer
+
+WORDS = (
+    "agent retrieval embedding vector chroma langchain python pipeline project "
+    "resume skills streamlit fastapi memory history token chunk loader router"
+).split()
+
+
+def make_chunks(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(80, 220))) for _ in range(count)]
+
+
+def run(server, chunks, concurrency, batch_tokens, tokens_per_minute):
+    server.reset()
+    provider = OpenAIEmbeddings(
+        model="text-embedding-3-small",
+        base_url=server.url,
+        api_key="fake-key",
+        max_retries=0,
+        check_embedding_ctx_length=False,
+    )
+    embeddings = ScheduledEmbeddings(
+        provider,
+        batch_tokens=batch_tokens,
+        concurrency=concurrency,
+        tokens_per_minute=tokens_per_minute,
+        base_delay=0.1,
+    )
+
+    start = time.perf_counter()
+    vectors = embeddings.embed_documents(chunks)
+    elapsed = time.perf_counter() - start
+    assert len(vectors) == len(chunks) and all(vectors)
+
+    return dict(
+        concurrency=concurrency,
+        seconds=round(elapsed, 2),
+        chunks_per_s=round(len(chunks) / elapsed, 1),
+        server_requests=server.requests,
+        server_429s=server.throttled,
+        peak_in_flight=server.peak_in_flight,
+        **embeddings.stats(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-tokens", type=int, default=8000)
+    parser.add_argument("--tokens-per-minute", type=int, default=10_000_000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--server-limit", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = FakeEmbeddingServer(
+        latency=args.latency,
+        max_concurrent=args.server_limit,
+        error_rate=args.error_rate,
+        retry_after=0.1,
+    ).start()
+    try:
+        chunks = make_chunks(args.chunks)
+        print(f"--- {len(chunks)} chunks against {server.url} ---")
+        for concurrency in args.concurrency:
+            print(
+                run(
+                    server,
+                    chunks,
+                    concurrency,
+                    args.batch_tokens,
+                    args.tokens_per_minute,
+                )
+            )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
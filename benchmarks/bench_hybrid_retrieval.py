@@ -0,0 +1,129 @@
+"""
+Latency and recall@k: vector-only retriever vs hybrid BM25 + vector (RRF).
+
+Indexes assets/ into an in-memory Chroma collection and runs a fixed set of
+questions whose answer lives in a known file. With OPENAI_API_KEY set the
+real (cached) embedding model is used; otherwise a deterministic fake with
+--embed-latency seconds per query stands in, which makes vector recall
+chance-level but still shows what skipping the embedding call is worth.
+
+    python -m benchmarks.bench_hybrid_retrieval --k 5 --repeat 5
+"""
+
+import os
+import time
+import argparse
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from agent_module.loaders import list_source_files
+from agent_module.pipeline import ingest_documents
+from agent_module.lexical_index import BM25Index, HybridRetriever
+from agent_module.retriever_cache import CachedRetriever, RetrieverCache
+
+DATA_FOLDER = "assets/"
+
+# (question, file the answer comes from)
+QUERIES = [
+    ("FastAPI", "skills.csv"),
+    ("What level is my LangChain skill?", "skills.csv"),
+    ("Ubuntu Linux", "skills.csv"),
+    ("Dhamu", "profile.json"),
+    ("Where is Arati located? Surat", "profile.json"),
+    ("Tell me about yourself.", "hr_qa_knowledge_base.txt"),
+    ("What are your weaknesses?", "hr_qa_knowledge_base.txt"),
+    ("Where do you see yourself in 5 years?", "hr_qa_knowledge_base.txt"),
+    ("Reasoning Layer", "system_design.txt"),
+    ("How do you prefer to design systems and architecture?", "system_design.txt"),
+    ("Digital Twin tech used", "projects.md"),
+    ("How did your learning journey start?", "learning_journey.md"),
+]
+
+
+class SlowFakeEmbeddings(DeterministicFakeEmbedding):
+    """Fake vectors plus a fixed delay per query, like an API round trip."""
+
+    latency: float = 0.0
+    query_calls: int = 0
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def build(embedding):
+    vectorstore = Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name=f"bench_{time.time_ns()}",
+        embedding_function=embedding,
+    )
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    ingest_documents(
+        vectorstore, DATA_FOLDER, list_source_files(DATA_FOLDER), text_splitter
+    )
+    return vectorstore
+
+
+def measure(name, retriever, k, repeat):
+    found = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for question, expected in QUERIES:
+            docs = retriever.invoke(question)
+            sources = [os.path.basename(doc.metadata.get("source", "")) for doc in docs]
+            found += expected in sources[:k]
+    elapsed = time.perf_counter() - start
+    lookups = repeat * len(QUERIES)
+    return {
+        "retriever": name,
+        "recall_at_k": round(found / lookups, 3),
+        "ms_per_query": round(elapsed / lookups * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--embed-latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    if os.getenv("OPENAI_API_KEY"):
+        from agent_module.embeddings import get_embedding_model
+
+        embedding = get_embedding_model()
+    else:
+        print(
+            "   ! OPENAI_API_KEY not set: using fake embeddings (vector recall is noise)"
+        )
+        embedding = SlowFakeEmbeddings(size=256, latency=args.embed_latency)
+
+    vectorstore = build(embedding)
+    lexical = BM25Index.from_vectorstore(vectorstore)
+    print(f"--- Indexed {len(lexical)} chunks ---")
+
+    # A zero-size cache: every lookup is a real search
+    no_cache = RetrieverCache(max_entries=0)
+    retrievers = [
+        ("vector", CachedRetriever(vectorstore=vectorstore, k=args.k, cache=no_cache)),
+        (
+            "hybrid",
+            HybridRetriever(
+                vectorstore=vectorstore, lexical=lexical, k=args.k, cache=no_cache
+            ),
+        ),
+    ]
+    for name, retriever in retrievers:
+        calls = getattr(embedding, "query_calls", None)
+        result = measure(name, retriever, args.k, args.repeat)
+        if calls is not None:
+            result["embed_calls"] = embedding.query_calls - calls
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
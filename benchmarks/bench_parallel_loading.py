@@ -0,0 +1,128 @@
+"""
+Serial vs parallel document loading on a synthetic corpus.
+
+Run from the repo root:
+    python -m benchmarks.bench_parallel_loading --files 64 --pages 20 --workers 1 2 4
+"""
+
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+from agent_module.loaders import list_source_files, iter_load_files
+
+WORDS = (
+    "agent retrieval embedding vector chroma langchain python pipeline project "
+    "resume skills streamlit fastapi memory history token chunk loader router"
+).split()
+
+
+# --- PART 1: SYNTHETIC CORPUS ---
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, pages):
+    """Writes a minimal but valid text PDF (one content stream per page)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # the page tree, filled in once we know the page ids
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 12 TL 40 800 Td "
+        body += " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines)
+        body += " ET"
+        stream = body.encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def build_corpus(folder, files, pages, seed=0):
+    rng = random.Random(seed)
+    for i in range(files):
+        doc_pages = [
+            [" ".join(rng.choices(WORDS, k=12)) for _ in range(60)]
+            for _ in range(pages)
+        ]
+        write_pdf(os.path.join(folder, f"doc_{i:04d}.pdf"), doc_pages)
+        # A few text files too, so the router sees a realistic mix
+        with open(os.path.join(folder, f"notes_{i:04d}.md"), "w") as f:
+            f.write("\n".join(" ".join(rng.choices(WORDS, k=12)) for _ in range(200)))
+
+
+# --- PART 2: THE BENCHMARK ---
+def run(file_paths, workers):
+    start = time.perf_counter()
+    docs = 0
+    chars = 0
+    errors = 0
+    for _, loaded, error in iter_load_files(file_paths, max_workers=workers):
+        errors += bool(error)
+        docs += len(loaded)
+        chars += sum(len(doc.page_content) for doc in loaded)
+    elapsed = time.perf_counter() - start
+    return {
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "files_per_s": round(len(file_paths) / elapsed, 1),
+        "docs": docs,
+        "chars": chars,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench_loading_")
+    try:
+        build_corpus(folder, args.files, args.pages)
+        file_paths = list_source_files(folder)
+        print(f"--- Corpus: {len(file_paths)} files in {folder} ---")
+
+        baseline = None
+        for workers in args.workers:
+            result = run(file_paths, workers)
+            baseline = baseline or result["seconds"]
+            result["speedup"] = round(baseline / result["seconds"], 2)
+            print(result)
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
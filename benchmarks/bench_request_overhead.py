@@ -0,0 +1,89 @@
+"""
+Per-request overhead outside the LLM call.
+
+Compares building RunnableWithMessageHistory on every request (the old
+server.py / app.py hot path) with one long-lived wrapper plus the
+SessionHistoryCache. The agent is a zero-latency stand-in, so whatever time
+is left is pure wrapper + history-handle overhead.
+
+    python -m benchmarks.bench_request_overhead --requests 500 --sessions 20
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain_community.chat_message_histories import FileChatMessageHistory
+
+from agent_module.sessions import SessionHistoryCache
+
+AGENT = RunnableLambda(lambda inputs: {"output": "ok"})
+
+
+def make_factory(use_files, folder):
+    if use_files:
+        return lambda session_id: FileChatMessageHistory(
+            os.path.join(folder, f"memory_{session_id}.json")
+        )
+    # In-memory stores still need to live somewhere between requests
+    stores = {}
+    return lambda session_id: stores.setdefault(
+        session_id, InMemoryChatMessageHistory()
+    )
+
+
+def wrap(get_session_history):
+    return RunnableWithMessageHistory(
+        AGENT,
+        get_session_history,
+        input_messages_key="input",
+        history_messages_key="chat_history",
+    )
+
+
+def per_request(factory, requests, sessions):
+    start = time.perf_counter()
+    for i in range(requests):
+        bot = wrap(factory)
+        bot.invoke(
+            {"input": "hi"}, {"configurable": {"session_id": f"s{i % sessions}"}}
+        )
+    return time.perf_counter() - start
+
+
+def long_lived(factory, requests, sessions):
+    bot = wrap(SessionHistoryCache(factory))
+    start = time.perf_counter()
+    for i in range(requests):
+        bot.invoke(
+            {"input": "hi"}, {"configurable": {"session_id": f"s{i % sessions}"}}
+        )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--file-history", action="store_true")
+    args = parser.parse_args()
+
+    for name, run in [("per_request", per_request), ("long_lived", long_lived)]:
+        folder = tempfile.mkdtemp(prefix="bench_overhead_")
+        factory = make_factory(args.file_history, folder)
+        elapsed = run(factory, args.requests, args.sessions)
+        print(
+            {
+                "mode": name,
+                "requests": args.requests,
+                "overhead_ms_per_request": round(elapsed / args.requests * 1000, 3),
+            }
+        )
+
+
+if __name__ == "__main__":
+    main()
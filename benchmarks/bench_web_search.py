@@ -0,0 +1,91 @@
+"""
+Web search tool latency under concurrent load, against FakeSearchBackend.
+
+"plain" calls the backend directly, the way DuckDuckGoSearchRun did (no cache,
+no deadline, no limit). "cached" goes through CachedWebSearch. Queries repeat
+(recruiters ask the same things), and --slow-rate of searches hang for
+--slow-latency seconds.
+
+    python -m benchmarks.bench_web_search --requests 200 --threads 16 --slow-rate 0.05
+"""
+
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from agent_module.web_search import CachedWebSearch, SearchCache
+from benchmarks.fake_search_backend import FakeSearchBackend
+
+TOPICS = [
+    "latest LangChain release",
+    "what is agentic RAG",
+    "ChromaDB vs FAISS",
+    "FastAPI streaming responses",
+    "gpt-4o-mini pricing",
+    "Streamlit cloud sqlite error",
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(name, search, queries, threads):
+    latencies = []
+    unavailable = 0
+
+    def one(query):
+        start = time.perf_counter()
+        result = search(query)
+        return time.perf_counter() - start, result
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for elapsed, result in pool.map(one, queries):
+            latencies.append(elapsed)
+            unavailable += result.startswith("Web search is unavailable")
+    return {
+        "mode": name,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+        "unavailable": unavailable,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=120)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=8.0)
+    parser.add_argument("--timeout", type=float, default=2.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    queries = [rng.choice(TOPICS) for _ in range(args.requests)]
+
+    def backend():
+        return FakeSearchBackend(args.latency, args.slow_rate, args.slow_latency)
+
+    plain = backend()
+    result = run("plain", plain, queries, args.threads)
+    print(dict(result, backend_calls=plain.calls, peak_concurrency=plain.max_in_flight))
+
+    fake = backend()
+    tool = CachedWebSearch(backend=fake, timeout=args.timeout, cache=SearchCache())
+    result = run("cached", tool.invoke, queries, args.threads)
+    print(
+        dict(
+            result,
+            backend_calls=fake.calls,
+            peak_concurrency=fake.max_in_flight,
+            cache=tool.cache.stats(),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
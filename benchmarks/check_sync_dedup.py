@@ -0,0 +1,99 @@
+"""
+Regression check: incremental sync must never lose a file's content to dedup.
+
+a.txt and b.txt share a paragraph (b's copy has one extra word), so the first
+sync keeps a's chunk, drops b's and lists both files in its "sources". Then:
+  rewrite  a.txt is rewritten; b.txt is untouched
+  delete   a.txt is deleted; b.txt is untouched
+  edit-b   b.txt is rewritten; a's chunk must stop listing b.txt
+In the first two, b's paragraph must be back in the collection afterwards.
+Exits non-zero on failure. Offline (FakeEmbeddings), no API key needed.
+
+Run from the repo root:
+    python -m benchmarks.check_sync_dedup
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+from langchain_chroma import Chroma
+
+from agent_module.chunking import get_text_splitter
+from agent_module.indexing import sync_vectorstore
+from benchmarks.fakes import FakeEmbeddings
+
+SHARED = (
+    "Arati built the ingestion pipeline for the portfolio assistant. It loads "
+    "PDFs, Markdown and CSV files, splits them by structure, embeds only the "
+    "chunks whose content changed and upserts them in batches, so restarting "
+    "the API after editing one file costs a handful of embedding calls instead "
+    "of a full rebuild of the whole vector database."
+)
+MARKER = "zanzibar"
+
+
+def write(folder, name, text):
+    with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def collection_chunks(vectorstore):
+    data = vectorstore._collection.get(include=["documents", "metadatas"])
+    return list(zip(data["documents"], data["metadatas"]))
+
+
+def run_case(case, workdir):
+    """Returns an error message, or None when the case passes."""
+    data_folder = os.path.join(workdir, case, "data")
+    persist_directory = os.path.join(workdir, case, "chroma")
+    os.makedirs(data_folder)
+    write(data_folder, "a.txt", SHARED)
+    write(data_folder, "b.txt", SHARED.replace("pipeline", f"pipeline {MARKER}"))
+    vectorstore = Chroma(
+        collection_name=f"sync_dedup_{case.replace('-', '_')}",
+        persist_directory=persist_directory,
+        embedding_function=FakeEmbeddings(),
+    )
+    splitter = get_text_splitter()
+
+    print(f"--- [{case}] Sync 1: a.txt + b.txt (near-duplicates) ---")
+    sync_vectorstore(vectorstore, data_folder, persist_directory, splitter)
+    chunks = collection_chunks(vectorstore)
+    if len(chunks) != 1 or "b.txt" not in chunks[0][1].get("sources", ""):
+        return f"expected one merged chunk listing both files, got {chunks}"
+
+    print(f"--- [{case}] Sync 2 ---")
+    if case == "rewrite":
+        write(data_folder, "a.txt", "Arati now mostly writes about evaluation.")
+    elif case == "delete":
+        os.remove(os.path.join(data_folder, "a.txt"))
+    else:
+        write(data_folder, "b.txt", "Something else entirely about evaluation.")
+    sync_vectorstore(vectorstore, data_folder, persist_directory, splitter)
+
+    chunks = collection_chunks(vectorstore)
+    if case == "edit-b":
+        if any("sources" in metadata for _, metadata in chunks):
+            return f"a's chunk still lists b.txt as a source: {chunks}"
+    elif not any(MARKER in text for text, _ in chunks):
+        return f"b.txt's content is gone from the index ({len(chunks)} chunks)"
+    return None
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix="sync_dedup_")
+    failures = 0
+    try:
+        for case in ("rewrite", "delete", "edit-b"):
+            error = run_case(case, workdir)
+            print(f"{'FAIL' if error else 'OK'}: {case}{': ' + error if error else ''}")
+            failures += bool(error)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
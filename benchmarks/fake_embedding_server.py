@@ -0,0 +1,175 @@
+"""
+A local stand-in for the OpenAI embeddings endpoint.
+
+Returns deterministic vectors, sleeps to simulate latency, and answers 429
+(with Retry-After) when too many requests are in flight or at random.
+Point OpenAIEmbeddings at it with base_url=server.url and any api_key.
+
+    python -m benchmarks.fake_embedding_server --port 8765 --latency 0.2
+"""
+
+import json
+import time
+import base64
+import random
+import struct
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_vector(item, dimensions):
+    # Same input -> same vector, whether it arrives as text or as token ids
+    seed = hashlib.sha256(json.dumps(item).encode("utf-8")).digest()
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) for _ in range(dimensions)]
+
+
+class FakeEmbeddingServer:
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.2,
+        per_input_latency=0.001,
+        max_concurrent=4,
+        error_rate=0.0,
+        retry_after=0.2,
+        dimensions=64,
+    ):
+        self.latency = latency
+        self.per_input_latency = per_input_latency
+        self.max_concurrent = max_concurrent
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.dimensions = dimensions
+
+        self.requests = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/v1"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.throttled = self.peak_in_flight = 0
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                if not self.path.endswith("/embeddings"):
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                with server._lock:
+                    server.requests += 1
+                    busy = server.in_flight >= server.max_concurrent
+                    if busy or random.random() < server.error_rate:
+                        server.throttled += 1
+                        throttle = True
+                    else:
+                        throttle = False
+                        server.in_flight += 1
+                        server.peak_in_flight = max(
+                            server.peak_in_flight, server.in_flight
+                        )
+
+                if throttle:
+                    self._send(
+                        429,
+                        {
+                            "error": {
+                                "message": "Rate limit reached",
+                                "type": "requests",
+                            }
+                        },
+                        {"Retry-After": str(server.retry_after)},
+                    )
+                    return
+
+                try:
+                    inputs = request.get("input", [])
+                    if isinstance(inputs, str) or (
+                        inputs and isinstance(inputs[0], int)
+                    ):
+                        inputs = [inputs]
+                    time.sleep(server.latency + server.per_input_latency * len(inputs))
+
+                    data = []
+                    for index, item in enumerate(inputs):
+                        vector = fake_vector(item, server.dimensions)
+                        if request.get("encoding_format") == "base64":
+                            packed = struct.pack(f"<{len(vector)}f", *vector)
+                            vector = base64.b64encode(packed).decode("ascii")
+                        data.append(
+                            {"object": "embedding", "index": index, "embedding": vector}
+                        )
+                    tokens = sum(len(str(item).split()) for item in inputs)
+                    self._send(
+                        200,
+                        {
+                            "object": "list",
+                            "data": data,
+                            "model": request.get("model", "fake-embedding"),
+                            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                        },
+                    )
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeEmbeddingServer(
+        port=args.port,
+        latency=args.latency,
+        max_concurrent=args.max_concurrent,
+        error_rate=args.error_rate,
+    )
+    print(f"--- Fake embedding server on {server.url} ---")
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
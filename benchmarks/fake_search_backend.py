@@ -0,0 +1,40 @@
+"""
+In-process stand-in for DuckDuckGo: a callable query -> text with configurable
+latency, a share of very slow ("hung") searches and random failures. It
+records how many searches ran and the peak number running at once.
+"""
+
+import time
+import random
+import threading
+
+
+class FakeSearchBackend:
+    def __init__(
+        self, latency=0.3, slow_rate=0.0, slow_latency=10.0, error_rate=0.0, seed=0
+    ):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, query):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            roll = self._rng.random()
+        try:
+            if roll < self.error_rate:
+                raise ConnectionError("fake search backend error")
+            slow = roll < self.error_rate + self.slow_rate
+            time.sleep(self.slow_latency if slow else self.latency)
+            return f"[snippet: Top result for '{query}'., title: {query}, link: https://example.com]"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
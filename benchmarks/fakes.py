@@ -0,0 +1,157 @@
+"""
+Deterministic, offline stand-ins for the OpenAI chat model and embeddings,
+with simulated latency, so every entry point can be benchmarked locally:
+
+    create_agent_system(vectorstore, llm=ScriptedChatModel())
+    get_agent_executor(llm=ScriptedChatModel(), embedding=FakeEmbeddings())
+    create_conversational_rag_chain(vectorstore, llm=ScriptedChatModel())
+"""
+
+import re
+import json
+import time
+import zlib
+import threading
+from typing import Any, List
+
+import numpy as np
+from pydantic import PrivateAttr
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agent_module.tokens import count_tokens
+
+WORD = re.compile(r"\w+")
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Hashed bag-of-words vectors: texts sharing words get similar vectors, so
+    retrieval recall means something, and the same text always gets the same
+    vector. latency is slept once per call, per_text_latency once per text.
+    """
+
+    def __init__(self, size=256, latency=0.0, per_text_latency=0.0):
+        self.size = size
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        vector = np.zeros(self.size)
+        for word in WORD.findall(text.lower()):
+            bucket = zlib.crc32(word.encode("utf-8"))
+            vector[bucket % self.size] += 1.0 if bucket & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _wait(self, count):
+        with self._lock:
+            self.calls += 1
+            self.texts += count
+        time.sleep(self.latency + self.per_text_latency * count)
+
+    def embed_documents(self, texts):
+        self._wait(len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self._wait(1)
+        return self._vector(text)
+
+    def stats(self):
+        return {"calls": self.calls, "texts": self.texts}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    A chat model that plays a fixed tool-calling script.
+    steps[i] lists the tools to call (together) at step i of a turn, with the
+    user's question as the query; once the steps run out it answers with the
+    first answer_words words of what the tools returned. Without tools bound
+    (question rewriting, history summaries, the plain RAG chain) it echoes
+    the last user message. Works with tool-calling and OpenAI-functions agents.
+    """
+
+    steps: List[List[str]] = [["search_my_files"]]
+    latency: float = 0.0
+    answer_words: int = 40
+    _calls: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self):
+        return "scripted-fake"
+
+    @property
+    def calls(self):
+        return self._calls
+
+    def bind_tools(self, tools, **kwargs):
+        names = [convert_to_openai_tool(tool)["function"]["name"] for tool in tools]
+        return self.bind(tools=names, **kwargs)
+
+    def _reply(self, messages, tools, functions_api):
+        turn_start = max(
+            (i for i, m in enumerate(messages) if isinstance(m, HumanMessage)),
+            default=0,
+        )
+        question = str(messages[turn_start].content) if messages else ""
+        if not tools:
+            return AIMessage(content=question)
+
+        turn = messages[turn_start + 1 :]
+        step = sum(isinstance(m, AIMessage) for m in turn)
+        if step < len(self.steps):
+            calls = [
+                {"name": name, "args": {"query": question}, "id": f"call_{step}_{i}"}
+                for i, name in enumerate(self.steps[step])
+                if name in tools
+            ]
+            if calls and functions_api:
+                # Like ChatOpenAI with functions=: one call per message, carried
+                # only in additional_kwargs (tool_calls stays empty)
+                function_call = {
+                    "name": calls[0]["name"],
+                    "arguments": json.dumps(calls[0]["args"]),
+                }
+                return AIMessage(
+                    content="", additional_kwargs={"function_call": function_call}
+                )
+            if calls:
+                return AIMessage(content="", tool_calls=calls)
+
+        observations = " ".join(
+            str(m.content) for m in turn if not isinstance(m, AIMessage)
+        )
+        words = WORD.findall(observations)[: self.answer_words]
+        return AIMessage(content=" ".join(words) or "I am not sure.")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with self._lock:
+            self._calls += 1
+        time.sleep(self.latency)
+
+        functions = kwargs.get("functions")
+        if functions:
+            tools = [f["name"] for f in functions]
+        else:
+            tools = kwargs.get("tools") or []
+        message = self._reply(messages, tools, bool(functions))
+
+        input_tokens = sum(count_tokens(str(m.content)) for m in messages)
+        planned = len(message.tool_calls) or int(
+            "function_call" in message.additional_kwargs
+        )
+        output_tokens = count_tokens(str(message.content)) + 10 * planned
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
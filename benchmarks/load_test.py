@@ -0,0 +1,287 @@
+"""
+HTTP load test for the production API's POST /chat.
+
+The real server.py app runs with stubbed providers (the scripted chat model,
+fake embeddings and fake web search from benchmarks/), either in-process
+(ASGI transport, no sockets) or behind a local uvicorn on a free port; --url
+points it at a server you started yourself instead. Every session sends its
+turns one after another; together they aim at --rate requests per second.
+
+Reports throughput, p50/p95/p99 latency, error rate by status, and how the
+chat history grew per session, as sorted JSON that diffs cleanly between commits.
+
+    python -m benchmarks.load_test --sessions 20 --rate 10 --duration 30
+    python -m benchmarks.load_test --target inprocess --unique --llm-latency 0.5
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --history-db chat_history_api.sqlite
+"""
+
+import os
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+import contextlib
+from functools import partial
+
+import httpx
+
+from benchmarks.run_suite import (
+    DATA_FOLDER,
+    RESULTS_FOLDER,
+    QUERIES,
+    git_commit,
+    percentile,
+)
+
+READY_TIMEOUT_SECONDS = 300
+REQUEST_TIMEOUT_SECONDS = 120
+
+
+# --- THE STUBBED SERVER ---
+def stub_server(args, workdir):
+    """Imports server.py with fake providers and a scratch history database."""
+    # Per-turn trace lines would swamp the report
+    os.environ.setdefault("TRACE_LOG_FILE", os.path.join(workdir, "traces.jsonl"))
+    import server
+    from rag_core import get_agent_executor
+    from benchmarks.fakes import FakeEmbeddings, ScriptedChatModel
+    from benchmarks.fake_search_backend import FakeSearchBackend
+
+    server.get_agent_executor = partial(
+        get_agent_executor,
+        llm=ScriptedChatModel(steps=args.steps, latency=args.llm_latency),
+        embedding=FakeEmbeddings(latency=args.embed_latency),
+        search_backend=FakeSearchBackend(latency=args.search_latency),
+        data_folder=DATA_FOLDER,
+        persist_directory=os.path.join(workdir, "chroma_api"),
+    )
+    server.HISTORY_DB = os.path.join(workdir, "history.sqlite")
+    return server
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def run_uvicorn(app):
+    import uvicorn
+
+    port = free_port()
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    uvicorn_server = uvicorn.Server(config)
+    thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+    thread.start()
+    while not uvicorn_server.started:
+        time.sleep(0.05)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        uvicorn_server.should_exit = True
+        thread.join(timeout=10)
+
+
+async def wait_until_ready(client):
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/ready")
+            if response.status_code == 200:
+                return
+            if response.json().get("status") == "failed":
+                raise RuntimeError(f"Index build failed: {response.json()}")
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError("Server did not become ready")
+
+
+# --- THE LOAD ---
+async def session_loop(client, index, args, start, end, records):
+    """One user: a turn every sessions/rate seconds, never two at once."""
+    interval = args.sessions / args.rate
+    rng = random.Random(index)
+    next_at = start + rng.random() * interval
+    turn = 0
+    while next_at < end:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        question = QUERIES[(index + turn) % len(QUERIES)][0]
+        if args.unique:
+            question = f"{question} (session {index}, turn {turn})"
+        sent = time.perf_counter()
+        try:
+            response = await client.post(
+                "/chat", json={"query": question, "session_id": f"load_{index}"}
+            )
+            status = str(response.status_code)
+        except httpx.TimeoutException:
+            status = "timeout"
+        except httpx.TransportError as e:
+            status = type(e).__name__
+        records.append((status, time.perf_counter() - sent))
+        turn += 1
+        # A slow reply pushes the next turn back, like a real user waiting
+        next_at = max(next_at + interval, time.perf_counter())
+
+
+async def drive(client, args):
+    records = []
+    start = time.perf_counter()
+    end = start + args.duration
+    await asyncio.gather(
+        *(
+            session_loop(client, i, args, start, end, records)
+            for i in range(args.sessions)
+        )
+    )
+    return records, time.perf_counter() - start
+
+
+def history_growth(db_path, sessions, bytes_before):
+    if not db_path or not os.path.exists(db_path):
+        return None
+    from agent_module.history_store import SQLiteChatMessageHistory
+
+    counts = [
+        SQLiteChatMessageHistory(f"load_{i}", db_path).count() for i in range(sessions)
+    ]
+    bytes_after = db_bytes(db_path)
+    messages = sum(counts)
+    return {
+        "messages_total": messages,
+        "messages_per_session_mean": round(messages / sessions, 1),
+        "messages_per_session_max": max(counts),
+        "db_bytes_before": bytes_before,
+        "db_bytes_after": bytes_after,
+        "bytes_per_message": (
+            round((bytes_after - bytes_before) / messages) if messages else None
+        ),
+    }
+
+
+def db_bytes(db_path):
+    if not db_path:
+        return 0
+    return sum(
+        os.path.getsize(path)
+        for path in (db_path, db_path + "-wal")
+        if os.path.exists(path)
+    )
+
+
+def summarize(records, elapsed, args):
+    latencies = [seconds for status, seconds in records if status == "200"]
+    statuses = {}
+    for status, _ in records:
+        statuses[status] = statuses.get(status, 0) + 1
+    errors = len(records) - len(latencies)
+    report = {
+        "requests": len(records),
+        "ok": len(latencies),
+        "error_rate": round(errors / len(records), 4) if records else None,
+        "status_counts": statuses,
+        "seconds": round(elapsed, 2),
+        "offered_rps": args.rate,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+    }
+    if latencies:
+        report["latency_ms"] = {
+            "p50": round(percentile(latencies, 0.5) * 1000, 1),
+            "p95": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1),
+        }
+    return report
+
+
+async def run(args, workdir):
+    timeout = httpx.Timeout(REQUEST_TIMEOUT_SECONDS)
+    limits = httpx.Limits(max_connections=args.sessions + 4)
+    quiet = open(os.devnull, "w")
+
+    if args.url:
+        db_path = args.history_db
+        client = httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits)
+        async with client:
+            await wait_until_ready(client)
+            before = db_bytes(db_path)
+            records, elapsed = await drive(client, args)
+        return records, elapsed, history_growth(db_path, args.sessions, before)
+
+    server = stub_server(args, workdir)
+    db_path = server.HISTORY_DB
+    if args.target == "inprocess":
+        transport = httpx.ASGITransport(app=server.app)
+        # ASGITransport does not run the lifespan, so enter it here
+        async with server.lifespan(server.app):
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://load", timeout=timeout
+            ) as client:
+                await wait_until_ready(client)
+                before = db_bytes(db_path)
+                with contextlib.redirect_stdout(quiet):
+                    records, elapsed = await drive(client, args)
+    else:
+        with run_uvicorn(server.app) as url:
+            async with httpx.AsyncClient(
+                base_url=url, timeout=timeout, limits=limits
+            ) as client:
+                await wait_until_ready(client)
+                before = db_bytes(db_path)
+                with contextlib.redirect_stdout(quiet):
+                    records, elapsed = await drive(client, args)
+    return records, elapsed, history_growth(db_path, args.sessions, before)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--target", choices=["uvicorn", "inprocess"], default="uvicorn")
+    parser.add_argument("--url", default=None, help="an already running server")
+    parser.add_argument("--history-db", default=None, help="its history database")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=10.0, help="requests/s, total")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--unique", action="store_true", help="no repeated questions (caches miss)"
+    )
+    parser.add_argument("--steps", type=json.loads, default=[["search_my_files"]])
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--out", default=None, help="JSON file (default: results/)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rag_load_")
+    records, elapsed, history = asyncio.run(run(args, workdir))
+
+    report = {
+        "suite": "load",
+        "target": args.url or args.target,
+        "git_commit": git_commit(),
+        "params": vars(args),
+        "results": summarize(records, elapsed, args),
+        "history": history,
+    }
+    print(json.dumps(report["results"], indent=2, sort_keys=True))
+    print(json.dumps(history, indent=2, sort_keys=True))
+
+    out = args.out or os.path.join(
+        RESULTS_FOLDER, f"load_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"--- Report written to {out} ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Chunking report: the old RecursiveCharacterTextSplitter(1000, 200) vs the
+format-aware StructuredSplitter, on the same folder.
+
+For each splitter: chunk count, embedding tokens (what ingestion pays for),
+recall@k on the benchmark questions, and how often the top hit for a
+curated Q&A question contains the whole curated answer (a split answer
+cannot). Retrieval is BM25 by default so the report runs offline;
+--vector uses the real embedding model (needs OPENAI_API_KEY).
+
+    python -m benchmarks.report_chunking --data assets/ --k 5
+"""
+
+import os
+import time
+import argparse
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from agent_module.chunking import StructuredSplitter
+from agent_module.loaders import list_source_files, load_files
+from agent_module.lexical_index import BM25Index
+from agent_module.qa_fastpath import QA_FILE_NAME, parse_qa_pairs
+from agent_module.tokens import count_tokens
+from benchmarks.bench_hybrid_retrieval import QUERIES
+
+
+def make_search(chunks, use_vectors):
+    if not use_vectors:
+        index = BM25Index()
+        index.add_documents(chunks)
+        return lambda query, k: [doc for doc, _ in index.search(query, k)]
+
+    import chromadb
+    from langchain_chroma import Chroma
+    from agent_module.embeddings import get_embedding_model
+
+    vectorstore = Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name=f"report_{time.time_ns()}",
+        embedding_function=get_embedding_model(),
+    )
+    vectorstore.add_documents(chunks)
+    return lambda query, k: vectorstore.similarity_search(query, k=k)
+
+
+def report(name, splitter, docs, qa_pairs, k, use_vectors):
+    chunks = splitter.split_documents(docs)
+    search = make_search(chunks, use_vectors)
+
+    found = 0
+    for question, expected in QUERIES:
+        sources = [
+            os.path.basename(d.metadata.get("source", "")) for d in search(question, k)
+        ]
+        found += expected in sources
+
+    whole = 0
+    for question, answer in qa_pairs:
+        top = search(question, 1)
+        whole += bool(top) and answer in top[0].page_content
+
+    return {
+        "splitter": name,
+        "chunks": len(chunks),
+        "embedding_tokens": sum(count_tokens(c.page_content) for c in chunks),
+        "recall_at_k": round(found / len(QUERIES), 3),
+        "qa_whole_answer_top1": round(whole / len(qa_pairs), 3) if qa_pairs else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default="assets/")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--vector", action="store_true")
+    args = parser.parse_args()
+
+    docs = load_files(list_source_files(args.data))
+    qa_path = os.path.join(args.data, QA_FILE_NAME)
+    qa_pairs = []
+    if os.path.exists(qa_path):
+        with open(qa_path, "r", encoding="utf-8") as f:
+            qa_pairs = parse_qa_pairs(f.read())
+
+    splitters = [
+        (
+            "recursive_1000_200",
+            RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200),
+        ),
+        ("structured", StructuredSplitter()),
+    ]
+    for name, splitter in splitters:
+        print(report(name, splitter, docs, qa_pairs, args.k, args.vector))
+
+
+if __name__ == "__main__":
+    main()
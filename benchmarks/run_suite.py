@@ -0,0 +1,325 @@
+"""
+Offline end-to-end benchmark suite: no OpenAI, no network.
+
+The chat model, embeddings and web search are deterministic fakes with
+simulated latency (benchmarks/fakes.py, fake_search_backend.py), plugged into
+the real entry points. Scenarios:
+
+  ingest     load -> split -> dedup -> embed -> upsert throughput, per corpus size
+  retrieval  vector vs hybrid latency (p50/p95) and recall@k, per corpus size
+  agent      full turns through create_agent_system (agent), get_agent_executor
+             (api) and create_conversational_rag_chain (pipeline), with history
+
+Results go to a JSON file (with the git commit), so runs can be compared.
+
+    python -m benchmarks.run_suite --sizes 0 50 200 --turns 24
+    python -m benchmarks.run_suite --scenarios agent --llm-latency 0.3
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+# The entry points read the key at import time; every model here is a fake
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path[:0] = [
+    os.path.join(ROOT_DIR, "03_The_Production_API"),
+    os.path.join(ROOT_DIR, "01_The_Pipeline"),
+]
+
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.runnables.history import RunnableWithMessageHistory
+
+from agent_module.chunking import get_text_splitter
+from agent_module.loaders import list_source_files
+from agent_module.pipeline import ingest_documents
+from agent_module.metrics import ingest_totals
+from agent_module.history_store import SQLiteChatMessageHistory
+from agent_module.lexical_index import BM25Index, HybridRetriever
+from agent_module.retriever_cache import CachedRetriever, RetrieverCache
+from benchmarks.fakes import FakeEmbeddings, ScriptedChatModel
+from benchmarks.fake_search_backend import FakeSearchBackend
+from benchmarks.bench_hybrid_retrieval import QUERIES
+
+DATA_FOLDER = os.path.join(ROOT_DIR, "assets")
+RESULTS_FOLDER = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+WORDS = (
+    "agent retrieval embedding vector chroma langchain python pipeline project "
+    "resume skills streamlit fastapi memory history token chunk loader router "
+    "design latency cache index query answer model prompt tool search session"
+).split()
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def latency_summary(seconds):
+    return {
+        "p50_ms": round(percentile(seconds, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(seconds, 0.95) * 1000, 2),
+        "mean_ms": round(sum(seconds) / len(seconds) * 1000, 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+# --- CORPUS ---
+def make_corpus(folder, extra_files, seed=0):
+    """assets/ plus extra_files synthetic Markdown files (5 sections each)."""
+    shutil.copytree(DATA_FOLDER, folder, dirs_exist_ok=True)
+    rng = random.Random(seed)
+    for n in range(extra_files):
+        sections = [
+            f"## Section {s}\n" + " ".join(rng.choices(WORDS, k=rng.randint(60, 140)))
+            for s in range(5)
+        ]
+        path = os.path.join(folder, f"synthetic_{n:04d}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# Note {n}\n\n" + "\n\n".join(sections))
+
+
+def build_vectorstore(folder, embedding):
+    vectorstore = Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name=f"suite_{time.time_ns()}",
+        embedding_function=embedding,
+    )
+    before = ingest_totals()
+    start = time.perf_counter()
+    chunks = ingest_documents(
+        vectorstore, folder, list_source_files(folder), get_text_splitter()
+    )
+    elapsed = time.perf_counter() - start
+    stages = {
+        stage: round(total - before.get(stage, 0.0), 3)
+        for stage, total in ingest_totals().items()
+    }
+    return vectorstore, chunks, elapsed, stages
+
+
+# --- SCENARIOS ---
+def run_ingest(extra_files, folder, args):
+    embedding = FakeEmbeddings(latency=args.embed_latency)
+    vectorstore, chunks, elapsed, stages = build_vectorstore(folder, embedding)
+    result = {
+        "extra_files": extra_files,
+        "files": len(list_source_files(folder)),
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "chunks_per_s": round(chunks / elapsed, 1) if elapsed else None,
+        "embed_calls": embedding.calls,
+        "stage_seconds": stages,
+    }
+    return vectorstore, result
+
+
+def run_retrieval(extra_files, vectorstore, args):
+    lexical = BM25Index.from_vectorstore(vectorstore)
+    no_cache = RetrieverCache(max_entries=0)
+    retrievers = {
+        "vector": CachedRetriever(vectorstore=vectorstore, k=args.k, cache=no_cache),
+        "hybrid": HybridRetriever(
+            vectorstore=vectorstore, lexical=lexical, k=args.k, cache=no_cache
+        ),
+    }
+    results = []
+    for name, retriever in retrievers.items():
+        seconds, found = [], 0
+        for _ in range(args.repeat):
+            for question, expected in QUERIES:
+                start = time.perf_counter()
+                docs = retriever.invoke(question)
+                seconds.append(time.perf_counter() - start)
+                sources = [os.path.basename(d.metadata.get("source", "")) for d in docs]
+                found += expected in sources
+        results.append(
+            {
+                "extra_files": extra_files,
+                "chunks": len(lexical),
+                "retriever": name,
+                "recall_at_k": round(found / (args.repeat * len(QUERIES)), 3),
+                **latency_summary(seconds),
+            }
+        )
+    return results
+
+
+def build_systems(args, workdir, vectorstore):
+    """name -> (runnable, history key, answer key, fake llm)"""
+    from agent_module.agent import create_agent_system
+    from main_bot import create_conversational_rag_chain
+    from rag_core import get_agent_executor
+
+    def llm():
+        return ScriptedChatModel(steps=args.steps, latency=args.llm_latency)
+
+    def search():
+        return FakeSearchBackend(latency=args.search_latency)
+
+    systems = {}
+    fake = llm()
+    systems["agent"] = (
+        create_agent_system(vectorstore, llm=fake, search_backend=search()),
+        "chat_history",
+        "output",
+        fake,
+    )
+    fake = llm()
+    systems["api"] = (
+        get_agent_executor(
+            llm=fake,
+            embedding=FakeEmbeddings(latency=args.embed_latency),
+            search_backend=search(),
+            data_folder=DATA_FOLDER,
+            persist_directory=os.path.join(workdir, "chroma_api"),
+        ),
+        "chat_history",
+        "output",
+        fake,
+    )
+    fake = llm()
+    systems["pipeline"] = (
+        create_conversational_rag_chain(vectorstore, llm=fake),
+        "history",
+        "answer",
+        fake,
+    )
+    return systems
+
+
+def run_agent(args, workdir, vectorstore):
+    db_path = os.path.join(workdir, "history.sqlite")
+    results = []
+    for name, (runnable, history_key, answer_key, fake) in build_systems(
+        args, workdir, vectorstore
+    ).items():
+        bot = RunnableWithMessageHistory(
+            runnable,
+            lambda session_id: SQLiteChatMessageHistory(session_id, db_path),
+            input_messages_key="input",
+            history_messages_key=history_key,
+            output_messages_key=answer_key,
+        )
+        config = {"configurable": {"session_id": f"suite_{name}"}}
+        seconds, tool_calls, shortcuts = [], 0, 0
+        for turn in range(args.turns):
+            question = QUERIES[turn % len(QUERIES)][0]
+            start = time.perf_counter()
+            response = bot.invoke({"input": question}, config=config)
+            seconds.append(time.perf_counter() - start)
+            tool_calls += len(response.get("intermediate_steps", []))
+            shortcuts += bool(response.get("cached") or response.get("fastpath"))
+        results.append(
+            {
+                "system": name,
+                "turns": args.turns,
+                **latency_summary(seconds),
+                "llm_calls": fake.calls,
+                "tool_calls": tool_calls,
+                "cached_or_fastpath": shortcuts,
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=["ingest", "retrieval", "agent"],
+        choices=["ingest", "retrieval", "agent"],
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[0, 50, 200],
+        help="synthetic files added to assets/",
+    )
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=24)
+    parser.add_argument(
+        "--steps",
+        type=json.loads,
+        default=[["search_my_files"]],
+        help='tool calls per agent step, as JSON: \'[["search_my_files", "duckduckgo_search"]]\'',
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--out", default=None, help="JSON file (default: results/)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rag_suite_")
+    report = {
+        "suite": "offline",
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": vars(args),
+        "results": {scenario: [] for scenario in args.scenarios},
+    }
+    try:
+        if "ingest" in args.scenarios or "retrieval" in args.scenarios:
+            for size in args.sizes:
+                folder = os.path.join(workdir, f"corpus_{size}")
+                make_corpus(folder, size)
+                vectorstore, ingested = run_ingest(size, folder, args)
+                if "ingest" in args.scenarios:
+                    report["results"]["ingest"].append(ingested)
+                    print(ingested)
+                if "retrieval" in args.scenarios:
+                    for result in run_retrieval(size, vectorstore, args):
+                        report["results"]["retrieval"].append(result)
+                        print(result)
+
+        if "agent" in args.scenarios:
+            vectorstore, _ = run_ingest(0, DATA_FOLDER, args)
+            for result in run_agent(args, workdir, vectorstore):
+                report["results"]["agent"].append(result)
+                print(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    out = args.out or os.path.join(
+        RESULTS_FOLDER, f"suite_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"--- Results written to {out} ---")
+
+
+if __name__ == "__main__":
+    main()